@@ -5,57 +5,93 @@ Usage: python stress_test.py [test_type] [options]
 """
 
 import argparse
-import concurrent.futures
-import queue
-import random
+import array
+import asyncio
+import itertools
 import sys
-import threading
 import time
+from collections import Counter, deque
 from datetime import datetime
 from typing import Dict
 
-import requests
+import httpx
+import numpy as np
+
+USER_AGENT = 'AggressiveWatermarkStressTester/2.0'
+# Samples drawn up front for sleeps and operation choices; cycled rather than redrawn per call
+RANDOM_POOL_SIZE = 65536
 
 
 class AggressiveStressTester:
     def __init__(self, base_url="http://127.0.0.1:8000"):
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'AggressiveWatermarkStressTester/2.0',
-            'Content-Type': 'application/x-www-form-urlencoded'
-        })
+        # All workers are coroutines on one event loop, so results need no locking
+        self._start_scenario(0)
+        self._rng = np.random.default_rng()
+
+    def log(self, message):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"[{timestamp}] {message}")
+
+    def _start_scenario(self, expected_operations: int):
+        """Reset results for a new scenario and preallocate its response-time buffer"""
         self.results = {
             'total_operations': 0,
             'successful_operations': 0,
             'failed_operations': 0,
-            'response_times': [],
-            'errors': [],
-            'start_time': None,
+            # Nanosecond samples; only the first total_operations entries are filled in
+            'response_times': array.array('q', bytes(8 * max(expected_operations, 1))),
+            'errors': Counter(),  # error message -> occurrences
+            'start_time': time.perf_counter(),
             'end_time': None
         }
-        self.lock = threading.Lock()
 
-    def log(self, message):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        print(f"[{timestamp}] {message}")
-        
-    def record_operation(self, success: bool, response_time: float, error: str = None):
-        """Thread-safe operation recording"""
-        with self.lock:
-            self.results['total_operations'] += 1
-            if success:
-                self.results['successful_operations'] += 1
-            else:
-                self.results['failed_operations'] += 1
-                if error:
-                    self.results['errors'].append(error)
-            self.results['response_times'].append(response_time)
+    def record_operation(self, success: bool, response_time_ns: int, error: str = None):
+        """Record the outcome of a single operation"""
+        response_times = self.results['response_times']
+        index = self.results['total_operations']
+        if index == len(response_times):
+            # Past the estimate: double the buffer rather than growing per sample
+            response_times.frombytes(bytes(8 * len(response_times)))
+        response_times[index] = response_time_ns
+        self.results['total_operations'] = index + 1
+        if success:
+            self.results['successful_operations'] += 1
+        else:
+            self.results['failed_operations'] += 1
+            if error:
+                self.results['errors'][error] += 1
+
+    def _response_times(self) -> np.ndarray:
+        """Zero-copy int64 view of the recorded response times in nanoseconds"""
+        return np.frombuffer(self.results['response_times'], dtype=np.int64, count=self.results['total_operations'])
+
+    def _uniform_pool(self, low, high):
+        """Endless iterator over precomputed uniform samples in [low, high)"""
+        return itertools.cycle(self._rng.uniform(low, high, RANDOM_POOL_SIZE).tolist())
+
+    def _client(self, concurrency: int) -> httpx.AsyncClient:
+        """Keep-alive client sized so every worker can hold one connection"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={'User-Agent': USER_AGENT},
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def _monitor(self, workers, interval, report_progress):
+        """Log progress every ``interval`` seconds until all workers finish"""
+        pending = workers
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=interval)
+            report_progress()
+        # Surface worker exceptions
+        await asyncio.gather(*workers)
 
     def test_connection(self):
         """Test if the application is reachable"""
         try:
-            response = self.session.get(f"{self.base_url}/blockchain/stats/", timeout=10)
+            response = httpx.get(f"{self.base_url}/blockchain/stats/", headers={'User-Agent': USER_AGENT},
+                                 timeout=10)
             if response.status_code == 200:
                 stats = response.json()
                 self.log(f"✅ Connection successful! Blockchain length: {stats.get('chain_length', 0)}")
@@ -70,116 +106,121 @@ class AggressiveStressTester:
     def extreme_mining_stress(self, num_blocks=100, concurrent_threads=20, duration_seconds=300):
         """Extreme mining stress test with high concurrency"""
         self.log(f"🔥 Starting EXTREME mining stress test:")
-        self.log(f"   Target: {num_blocks} blocks, {concurrent_threads} threads, {duration_seconds}s duration")
+        self.log(f"   Target: {num_blocks} blocks, {concurrent_threads} workers, {duration_seconds}s duration")
 
-        self.results['start_time'] = time.time()
+        self._start_scenario(num_blocks * 2)
+        asyncio.run(self._extreme_mining_stress(num_blocks, concurrent_threads, duration_seconds))
 
-        def mining_worker(worker_id):
+        self.results['end_time'] = time.perf_counter()
+        return self._generate_report()
+
+    async def _extreme_mining_stress(self, num_blocks, concurrent_threads, duration_seconds):
+        pauses = self._uniform_pool(0.01, 0.05)
+
+        async def mining_worker(client, worker_id):
             blocks_mined = 0
-            while time.time() - self.results['start_time'] < duration_seconds and blocks_mined < num_blocks // concurrent_threads:
-                start_time = time.time()
+            while time.perf_counter() - self.results['start_time'] < duration_seconds and blocks_mined < num_blocks // concurrent_threads:
+                start_time = time.perf_counter_ns()
                 try:
-                    response = self.session.post(f"{self.base_url}/blockchain/async-mine/",
-                                               data={'worker_id': worker_id}, timeout=30)
-                    response_time = time.time() - start_time
+                    response = await client.post("/blockchain/async-mine/", data={'worker_id': worker_id}, timeout=30)
+                    response_time_ns = time.perf_counter_ns() - start_time
 
                     if response.status_code == 200:
                         blocks_mined += 1
-                        self.record_operation(True, response_time)
+                        self.record_operation(True, response_time_ns)
                         if blocks_mined % 10 == 0:
                             self.log(f"Worker {worker_id}: {blocks_mined} blocks mined")
                     else:
-                        self.record_operation(False, response_time, f"HTTP {response.status_code}")
+                        self.record_operation(False, response_time_ns, f"HTTP {response.status_code}")
 
                 except Exception as e:
-                    response_time = time.time() - start_time
-                    self.record_operation(False, response_time, str(e))
+                    response_time_ns = time.perf_counter_ns() - start_time
+                    self.record_operation(False, response_time_ns, str(e))
 
                 # Brief pause to prevent overwhelming
-                time.sleep(random.uniform(0.01, 0.05))
+                await asyncio.sleep(next(pauses))
 
             self.log(f"Worker {worker_id} finished: {blocks_mined} blocks")
 
-        # Launch mining threads
-        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrent_threads) as executor:
-            futures = [executor.submit(mining_worker, i) for i in range(concurrent_threads)]
+        def report_progress():
+            ops_per_sec = self.results['total_operations'] / max(time.perf_counter() - self.results['start_time'], 1)
+            success_rate = (self.results['successful_operations'] / max(self.results['total_operations'], 1)) * 100
+            self.log(f"📊 Progress: {self.results['total_operations']} ops, "
+                     f"{ops_per_sec:.2f} ops/sec, {success_rate:.1f}% success")
 
-            # Monitor progress
-            while any(not f.done() for f in futures):
-                time.sleep(5)
-                with self.lock:
-                    ops_per_sec = self.results['total_operations'] / max(time.time() - self.results['start_time'], 1)
-                    success_rate = (self.results['successful_operations'] / max(self.results['total_operations'], 1)) * 100
-                    self.log(f"📊 Progress: {self.results['total_operations']} ops, "
-                           f"{ops_per_sec:.2f} ops/sec, {success_rate:.1f}% success")
-
-        self.results['end_time'] = time.time()
-        return self._generate_report()
+        async with self._client(concurrent_threads) as client:
+            workers = [asyncio.create_task(mining_worker(client, i)) for i in range(concurrent_threads)]
+            await self._monitor(workers, 5, report_progress)
 
-    def watermark_bombardment(self, num_operations=500, concurrent_threads=15, file_size_kb=1024):
+    def watermark_bombardment(self, num_operations=500, concurrent_threads=15):
         """Bombard the watermarking system with high-volume requests"""
         self.log(f"💥 Starting watermark BOMBARDMENT:")
-        self.log(f"   Target: {num_operations} operations, {concurrent_threads} threads, {file_size_kb}KB files")
+        self.log(f"   Target: {num_operations} operations, {concurrent_threads} workers")
 
-        # Generate test data
-        test_data = b'X' * (file_size_kb * 1024)  # Create large test file data
+        self._start_scenario(num_operations * 2)
+        asyncio.run(self._watermark_bombardment(num_operations, concurrent_threads))
 
-        self.results['start_time'] = time.time()
+        self.results['end_time'] = time.perf_counter()
+        return self._generate_report()
+
+    async def _watermark_bombardment(self, num_operations, concurrent_threads):
+        pauses = self._uniform_pool(0.001, 0.01)
+        strengths = self._uniform_pool(0.1, 1.0)
 
-        def watermark_worker(worker_id):
+        async def watermark_worker(client, worker_id):
             operations = 0
             target_ops = num_operations // concurrent_threads
 
             while operations < target_ops:
-                start_time = time.time()
+                start_time = time.perf_counter_ns()
                 try:
-                    # Simulate file upload with large data
-                    files = {'image': ('test_image.png', test_data, 'image/png')}
                     data = {
                         'watermark_text': f'STRESS_TEST_WORKER_{worker_id}_{operations}',
-                        'strength': random.uniform(0.1, 1.0)
+                        'strength': next(strengths)
                     }
 
-                    response = self.session.post(f"{self.base_url}/stress-test/watermarking/",
-                                               json=data, timeout=60)
-                    response_time = time.time() - start_time
+                    response = await client.post("/stress-test/watermarking/", json=data, timeout=60)
+                    response_time_ns = time.perf_counter_ns() - start_time
 
                     if response.status_code == 200:
                         operations += 1
-                        self.record_operation(True, response_time)
+                        self.record_operation(True, response_time_ns)
                     else:
-                        self.record_operation(False, response_time, f"HTTP {response.status_code}")
+                        self.record_operation(False, response_time_ns, f"HTTP {response.status_code}")
 
                 except Exception as e:
-                    response_time = time.time() - start_time
-                    self.record_operation(False, response_time, str(e))
+                    response_time_ns = time.perf_counter_ns() - start_time
+                    self.record_operation(False, response_time_ns, str(e))
 
                 # Very brief pause
-                time.sleep(random.uniform(0.001, 0.01))
+                await asyncio.sleep(next(pauses))
 
             self.log(f"Watermark worker {worker_id} completed {operations} operations")
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrent_threads) as executor:
-            futures = [executor.submit(watermark_worker, i) for i in range(concurrent_threads)]
+        def report_progress():
+            elapsed = time.perf_counter() - self.results['start_time']
+            ops_per_sec = self.results['total_operations'] / max(elapsed, 1)
+            avg_response = self._response_times().mean() / 1e9 if self.results['total_operations'] else 0.0
+            self.log(f"💥 Bombardment: {self.results['total_operations']} ops, "
+                     f"{ops_per_sec:.2f} ops/sec, {avg_response:.3f}s avg response")
 
-            # Real-time monitoring
-            while any(not f.done() for f in futures):
-                time.sleep(3)
-                with self.lock:
-                    elapsed = time.time() - self.results['start_time']
-                    ops_per_sec = self.results['total_operations'] / max(elapsed, 1)
-                    avg_response = sum(self.results['response_times']) / max(len(self.results['response_times']), 1)
-                    self.log(f"💥 Bombardment: {self.results['total_operations']} ops, "
-                           f"{ops_per_sec:.2f} ops/sec, {avg_response:.3f}s avg response")
-
-        self.results['end_time'] = time.time()
-        return self._generate_report()
+        async with self._client(concurrent_threads) as client:
+            workers = [asyncio.create_task(watermark_worker(client, i)) for i in range(concurrent_threads)]
+            await self._monitor(workers, 3, report_progress)
 
     def chaos_mode(self, duration_seconds=600, max_concurrent_ops=50):
         """Chaos mode: Random mix of all operations at maximum intensity"""
         self.log(f"🌪️  CHAOS MODE ACTIVATED!")
         self.log(f"   Duration: {duration_seconds}s, Max concurrent: {max_concurrent_ops}")
 
+        # The generator enqueues roughly one operation every 5.5 ms
+        self._start_scenario(duration_seconds * 200)
+        asyncio.run(self._chaos_mode(duration_seconds, max_concurrent_ops))
+
+        self.results['end_time'] = time.perf_counter()
+        return self._generate_report()
+
+    async def _chaos_mode(self, duration_seconds, max_concurrent_ops):
         operations = [
             ('mine', 0.3),
             ('watermark', 0.4),
@@ -187,141 +228,140 @@ class AggressiveStressTester:
             ('stats', 0.1)
         ]
 
-        self.results['start_time'] = time.time()
-        operation_queue = queue.Queue(maxsize=max_concurrent_ops * 2)
-
-        def chaos_worker(worker_id):
-            while time.time() - self.results['start_time'] < duration_seconds:
-                try:
-                    op_type = operation_queue.get(timeout=1)
-                    start_time = time.time()
-
-                    try:
-                        if op_type == 'mine':
-                            response = self.session.post(f"{self.base_url}/blockchain/async-mine/",
-                                                       data={'chaos_worker': worker_id}, timeout=45)
-                        elif op_type == 'watermark':
-                            data = {'watermark_text': f'CHAOS_{worker_id}'}
-                            response = self.session.post(f"{self.base_url}/stress-test/watermarking/",
-                                                       json=data, timeout=30)
-                        elif op_type == 'reveal':
-                            response = self.session.get(f"{self.base_url}/reveal/", timeout=15)
-                        else:  # stats
-                            response = self.session.get(f"{self.base_url}/blockchain/stats/", timeout=10)
-
-                        response_time = time.time() - start_time
-                        self.record_operation(response.status_code == 200, response_time)
-
-                    except Exception as e:
-                        response_time = time.time() - start_time
-                        self.record_operation(False, response_time, str(e))
-
-                    operation_queue.task_done()
-
-                except queue.Empty:
-                    continue
-
-        def operation_generator():
-            """Generate random operations"""
-            while time.time() - self.results['start_time'] < duration_seconds:
-                op_type = random.choices([op[0] for op in operations],
-                                       weights=[op[1] for op in operations])[0]
+        op_types = itertools.cycle(self._rng.choice(
+            [op[0] for op in operations], p=[op[1] for op in operations], size=RANDOM_POOL_SIZE).tolist())
+        pauses = self._uniform_pool(0.001, 0.01)
+        # Plain deque plus one counting semaphore: a worker waits on a single acquire per
+        # operation instead of a wait_for()-wrapped Queue.get() task
+        operation_queue = deque()
+        queued_operations = asyncio.Semaphore(0)
+        max_queued = max_concurrent_ops * 2
+
+        async def chaos_worker(client, worker_id):
+            while time.perf_counter() - self.results['start_time'] < duration_seconds:
+                await queued_operations.acquire()
+                op_type = operation_queue.popleft()
+                if op_type is None:  # Generator finished
+                    break
+
+                start_time = time.perf_counter_ns()
                 try:
-                    operation_queue.put(op_type, timeout=0.1)
-                except queue.Full:
-                    pass
-                time.sleep(random.uniform(0.001, 0.01))
+                    if op_type == 'mine':
+                        response = await client.post("/blockchain/async-mine/",
+                                                     data={'chaos_worker': worker_id}, timeout=45)
+                    elif op_type == 'watermark':
+                        data = {'watermark_text': f'CHAOS_{worker_id}'}
+                        response = await client.post("/stress-test/watermarking/", json=data, timeout=30)
+                    elif op_type == 'reveal':
+                        response = await client.get("/reveal/", timeout=15)
+                    else:  # stats
+                        response = await client.get("/blockchain/stats/", timeout=10)
 
-        # Start operation generator
-        generator_thread = threading.Thread(target=operation_generator)
-        generator_thread.daemon = True
-        generator_thread.start()
+                    response_time_ns = time.perf_counter_ns() - start_time
+                    self.record_operation(response.status_code == 200, response_time_ns)
 
-        # Start chaos workers
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_ops) as executor:
-            futures = [executor.submit(chaos_worker, i) for i in range(max_concurrent_ops)]
+                except Exception as e:
+                    response_time_ns = time.perf_counter_ns() - start_time
+                    self.record_operation(False, response_time_ns, str(e))
 
+        async def operation_generator():
+            """Generate random operations"""
+            while time.perf_counter() - self.results['start_time'] < duration_seconds:
+                if len(operation_queue) < max_queued:
+                    operation_queue.append(next(op_types))
+                    queued_operations.release()
+                await asyncio.sleep(next(pauses))
+
+            # One stop sentinel per worker so none stays blocked on an empty queue
+            for _ in range(max_concurrent_ops):
+                operation_queue.append(None)
+                queued_operations.release()
+
+        def report_progress():
+            elapsed = time.perf_counter() - self.results['start_time']
+            ops_per_sec = self.results['total_operations'] / max(elapsed, 1)
+            success_rate = (self.results['successful_operations'] / max(self.results['total_operations'], 1)) * 100
+            queue_size = len(operation_queue)
+            self.log(f"🌪️  CHAOS: {self.results['total_operations']} ops, "
+                     f"{ops_per_sec:.2f} ops/sec, {success_rate:.1f}% success, queue: {queue_size}")
+
+        async with self._client(max_concurrent_ops) as client:
+            generator = asyncio.create_task(operation_generator())
+            workers = [asyncio.create_task(chaos_worker(client, i)) for i in range(max_concurrent_ops)]
             # Monitoring with more frequent updates
-            while any(not f.done() for f in futures) and time.time() - self.results['start_time'] < duration_seconds:
-                time.sleep(2)
-                with self.lock:
-                    elapsed = time.time() - self.results['start_time']
-                    ops_per_sec = self.results['total_operations'] / max(elapsed, 1)
-                    success_rate = (self.results['successful_operations'] / max(self.results['total_operations'], 1)) * 100
-                    queue_size = operation_queue.qsize()
-                    self.log(f"🌪️  CHAOS: {self.results['total_operations']} ops, "
-                           f"{ops_per_sec:.2f} ops/sec, {success_rate:.1f}% success, queue: {queue_size}")
-
-        self.results['end_time'] = time.time()
-        return self._generate_report()
+            await self._monitor(workers, 2, report_progress)
+            await generator
 
     def endurance_test(self, duration_hours=2, steady_ops_per_second=10):
         """Long-running endurance test"""
         duration_seconds = duration_hours * 3600
         self.log(f"🏃‍♂️ Starting ENDURANCE test: {duration_hours}h at {steady_ops_per_second} ops/sec")
 
-        self.results['start_time'] = time.time()
+        self._start_scenario(int(duration_seconds * steady_ops_per_second))
+
+        # Run endurance test
+        asyncio.run(self._endurance_test(duration_seconds, steady_ops_per_second))
+
+        self.results['end_time'] = time.perf_counter()
+        return self._generate_report()
 
-        def endurance_worker():
-            operation_count = 0
-            target_interval = 1.0 / steady_ops_per_second
+    async def _endurance_test(self, duration_seconds, steady_ops_per_second):
+        operation_count = 0
+        target_interval = 1.0 / steady_ops_per_second
 
-            while time.time() - self.results['start_time'] < duration_seconds:
-                cycle_start = time.time()
+        async with self._client(1) as client:
+            while time.perf_counter() - self.results['start_time'] < duration_seconds:
+                cycle_start = time.perf_counter()
 
                 try:
                     # Rotate between different operations
                     ops = ['mine', 'watermark', 'stats']
                     op_type = ops[operation_count % len(ops)]
 
-                    start_time = time.time()
+                    start_time = time.perf_counter_ns()
 
                     if op_type == 'mine':
-                        response = self.session.post(f"{self.base_url}/blockchain/async-mine/",
-                                                   data={'endurance_test': True}, timeout=60)
+                        response = await client.post("/blockchain/async-mine/",
+                                                     data={'endurance_test': True}, timeout=60)
                     elif op_type == 'watermark':
                         data = {'watermark_text': f'ENDURANCE_{operation_count}'}
-                        response = self.session.post(f"{self.base_url}/stress-test/watermarking/",
-                                                   json=data, timeout=45)
+                        response = await client.post("/stress-test/watermarking/", json=data, timeout=45)
                     else:  # stats
-                        response = self.session.get(f"{self.base_url}/blockchain/stats/", timeout=15)
+                        response = await client.get("/blockchain/stats/", timeout=15)
 
-                    response_time = time.time() - start_time
-                    self.record_operation(response.status_code == 200, response_time)
+                    response_time_ns = time.perf_counter_ns() - start_time
+                    self.record_operation(response.status_code == 200, response_time_ns)
                     operation_count += 1
 
                     # Log progress every 1000 operations
                     if operation_count % 1000 == 0:
-                        elapsed_hours = (time.time() - self.results['start_time']) / 3600
-                        with self.lock:
-                            avg_response = sum(self.results['response_times']) / len(self.results['response_times'])
-                            success_rate = (self.results['successful_operations'] / self.results['total_operations']) * 100
-                            self.log(f"🏃‍♂️ Endurance {elapsed_hours:.1f}h: {operation_count} ops, "
-                                   f"{avg_response:.3f}s avg, {success_rate:.1f}% success")
+                        elapsed_hours = (time.perf_counter() - self.results['start_time']) / 3600
+                        avg_response = self._response_times().mean() / 1e9
+                        success_rate = (self.results['successful_operations'] / self.results['total_operations']) * 100
+                        self.log(f"🏃‍♂️ Endurance {elapsed_hours:.1f}h: {operation_count} ops, "
+                                 f"{avg_response:.3f}s avg, {success_rate:.1f}% success")
 
                 except Exception as e:
-                    response_time = time.time() - start_time
-                    self.record_operation(False, response_time, str(e))
+                    response_time_ns = time.perf_counter_ns() - start_time
+                    self.record_operation(False, response_time_ns, str(e))
 
                 # Maintain steady rate
-                cycle_time = time.time() - cycle_start
+                cycle_time = time.perf_counter() - cycle_start
                 sleep_time = max(0, target_interval - cycle_time)
                 if sleep_time > 0:
-                    time.sleep(sleep_time)
-
-        # Run endurance test
-        endurance_worker()
-
-        self.results['end_time'] = time.time()
-        return self._generate_report()
+                    await asyncio.sleep(sleep_time)
 
     def _generate_report(self) -> Dict:
         """Generate comprehensive test report"""
-        if not self.results['response_times']:
+        if not self.results['total_operations']:
             return {'error': 'No operations completed'}
 
         elapsed_time = self.results['end_time'] - self.results['start_time']
-        response_times = sorted(self.results['response_times'])
+        # Partition selects percentiles in O(n) without sorting
+        response_times = self._response_times()
+        count = len(response_times)
+        percentile_indexes = [count // 2, int(count * 0.95), int(count * 0.99)]
+        p50, p95, p99 = np.partition(response_times, percentile_indexes)[percentile_indexes] * 1e-9
 
         report = {
             'summary': {
@@ -333,16 +373,16 @@ class AggressiveStressTester:
                 'operations_per_second': self.results['total_operations'] / elapsed_time,
             },
             'performance': {
-                'avg_response_time': sum(response_times) / len(response_times),
-                'min_response_time': min(response_times),
-                'max_response_time': max(response_times),
-                'p50_response_time': response_times[len(response_times) // 2],
-                'p95_response_time': response_times[int(len(response_times) * 0.95)],
-                'p99_response_time': response_times[int(len(response_times) * 0.99)],
+                'avg_response_time': float(response_times.mean()) * 1e-9,
+                'min_response_time': float(response_times.min()) * 1e-9,
+                'max_response_time': float(response_times.max()) * 1e-9,
+                'p50_response_time': float(p50),
+                'p95_response_time': float(p95),
+                'p99_response_time': float(p99),
             },
             'errors': {
-                'total_errors': len(self.results['errors']),
-                'unique_errors': list(set(self.results['errors']))[:10],  # Top 10 unique errors
+                'total_errors': sum(self.results['errors'].values()),
+                'unique_errors': self.results['errors'].most_common(10),  # Top 10 errors with counts
             }
         }
 
@@ -0,0 +1,167 @@
+"""
+Numba-compiled proof-of-work nonce search.
+
+SHA-256 is implemented over plain integers so the whole search loop runs as
+native code without the GIL. Candidates are searched in rounds spread over
+all numba threads with ``prange``; each round keeps the smallest hit, so the
+result matches the sequential search. ``find_proof`` is ``None`` when numba is
+not installed; callers fall back to the hashlib implementation.
+"""
+import threading
+
+import numpy as np
+
+try:
+    from numba import get_num_threads, njit, prange
+except ImportError:  # pragma: no cover - numba is an optional accelerator
+    njit = None
+
+# Candidates each thread tries per round before the round's hits are compared
+ROUND_PER_THREAD = 1024
+
+_K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype=np.int64)
+
+_H = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype=np.int64)
+
+_MASK = 0xFFFFFFFF
+
+
+def _rotr(x, n):
+    return ((x >> n) | (x << (32 - n))) & _MASK
+
+
+def _write_decimal(value, buf):
+    """Write the ASCII decimal form of ``value`` into ``buf``; return its length."""
+    length = 0
+    if value < 0:
+        buf[0] = 45  # '-'
+        length = 1
+        value = -value
+    start = length
+    while True:
+        buf[length] = 48 + value % 10
+        value //= 10
+        length += 1
+        if value == 0:
+            break
+    # Digits were written least significant first
+    i = start
+    j = length - 1
+    while i < j:
+        buf[i], buf[j] = buf[j], buf[i]
+        i += 1
+        j -= 1
+    return length
+
+
+def _digest_state(buf, length, w, state):
+    """Hash the single-block message ``buf[:length]`` into ``state``."""
+    buf[length] = 0x80
+    for i in range(length + 1, 56):
+        buf[i] = 0
+    bit_length = length * 8
+    for i in range(8):
+        buf[63 - i] = (bit_length >> (8 * i)) & 0xFF
+
+    for t in range(16):
+        w[t] = (buf[4 * t] << 24) | (buf[4 * t + 1] << 16) | (buf[4 * t + 2] << 8) | buf[4 * t + 3]
+    for t in range(16, 64):
+        s0 = _rotr(w[t - 15], 7) ^ _rotr(w[t - 15], 18) ^ (w[t - 15] >> 3)
+        s1 = _rotr(w[t - 2], 17) ^ _rotr(w[t - 2], 19) ^ (w[t - 2] >> 10)
+        w[t] = (w[t - 16] + s0 + w[t - 7] + s1) & _MASK
+
+    a, b, c, d, e, f, g, h = _H[0], _H[1], _H[2], _H[3], _H[4], _H[5], _H[6], _H[7]
+    for t in range(64):
+        s1 = _rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)
+        ch = (e & f) ^ (~e & g & _MASK)
+        temp1 = (h + s1 + ch + _K[t] + w[t]) & _MASK
+        s0 = _rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)
+        maj = (a & b) ^ (a & c) ^ (b & c)
+        temp2 = (s0 + maj) & _MASK
+        h = g
+        g = f
+        f = e
+        e = (d + temp1) & _MASK
+        d = c
+        c = b
+        b = a
+        a = (temp1 + temp2) & _MASK
+
+    state[0] = (_H[0] + a) & _MASK
+    state[1] = (_H[1] + b) & _MASK
+    state[2] = (_H[2] + c) & _MASK
+    state[3] = (_H[3] + d) & _MASK
+    state[4] = (_H[4] + e) & _MASK
+    state[5] = (_H[5] + f) & _MASK
+    state[6] = (_H[6] + g) & _MASK
+    state[7] = (_H[7] + h) & _MASK
+
+
+def _meets_difficulty(state, difficulty):
+    for i in range(difficulty):
+        if (state[i // 8] >> (28 - 4 * (i % 8))) & 0xF:
+            return False
+    return True
+
+
+def _search_round(previous_proof, difficulty, base, lanes):
+    """Return the smallest proof in ``[base, base + lanes * ROUND_PER_THREAD)``, or 0."""
+    previous_square = previous_proof * previous_proof
+    hits = np.zeros(lanes, dtype=np.int64)
+    # Lane k tries base + k, base + k + lanes, ...; its first hit is the smallest in its stride
+    for lane in prange(lanes):
+        buf = np.zeros(64, dtype=np.int64)
+        w = np.zeros(64, dtype=np.int64)
+        state = np.zeros(8, dtype=np.int64)
+        for step in range(ROUND_PER_THREAD):
+            new_proof = base + lane + step * lanes
+            length = _write_decimal(new_proof * new_proof - previous_square, buf)
+            _digest_state(buf, length, w, state)
+            if _meets_difficulty(state, difficulty):
+                hits[lane] = new_proof
+                break
+    best = 0
+    for lane in range(lanes):
+        if hits[lane] and (best == 0 or hits[lane] < best):
+            best = hits[lane]
+    return best
+
+
+# One search at a time: it already occupies every numba thread
+_search_lock = threading.Lock()
+
+
+def _find_proof(previous_proof, difficulty):
+    lanes = get_num_threads()
+    base = 1
+    with _search_lock:
+        while True:
+            proof = _search_round(previous_proof, difficulty, base, lanes)
+            if proof:
+                return proof
+            base += lanes * ROUND_PER_THREAD
+
+
+if njit is not None:
+    # Rebind the helpers first so _search_round resolves the compiled versions
+    _rotr = njit(cache=True, nogil=True)(_rotr)
+    _write_decimal = njit(cache=True, nogil=True)(_write_decimal)
+    _digest_state = njit(cache=True, nogil=True)(_digest_state)
+    _meets_difficulty = njit(cache=True, nogil=True)(_meets_difficulty)
+    _search_round = njit(cache=True, nogil=True, parallel=True)(_search_round)
+    # Compiled (or loaded from the cache) on the first search, so processes that never mine with numba,
+    # e.g. management commands or a server using the OpenSSL extension, skip the compile and the thread pool
+    find_proof = _find_proof
+else:
+    find_proof = None
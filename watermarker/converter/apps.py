@@ -1,6 +1,23 @@
+import logging
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class ConverterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'converter'
+
+    def ready(self):
+        # Create the media directories once at startup rather than on every request that writes to them
+        for subdirectory in ('images', 'watermarked_images'):
+            os.makedirs(os.path.join(settings.MEDIA_ROOT, subdirectory), exist_ok=True)
+
+        # The OpenSSL/AVX2 proof-of-work extension is installed into site-packages by converter/_pow_build.py
+        try:
+            import _pow_cffi  # noqa: F401
+        except ImportError as e:
+            logger.warning("Proof-of-work extension not loaded (%s); mining falls back to numba or hashlib", e)
@@ -1,102 +1,176 @@
-import datetime
-import hashlib
-import json
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from hashlib import sha256 as _sha256
 from urllib.parse import urlparse
 
+import orjson
 import requests
 
+try:
+    from _pow_cffi import lib as _pow_lib
+except ImportError:  # Extension not installed; see converter/_pow_build.py
+    _pow_lib = None
+
+# Largest previous proof the native kernels accept without overflowing nonce**2 in int64
+MAX_PREVIOUS_PROOF = 2 ** 31
+
+
+@functools.cache
+def _numba_find_proof():
+    # Imported on first use, so importing this module (or mining with the extension) never loads numba
+    from converter._pow_numba import find_proof
+    return find_proof
+
 
 class Blockchain:
 
     def __init__(self, difficulty=4):
         self.chain = []
+        self._block_hashes = {}  # index -> (block, digest) for blocks of self.chain; kept out of the block dicts
         self.transactions = []
         self.difficulty = difficulty  # Adjustable difficulty
         self.create_block(proof=1, previous_hash='0')
         self.nodes = set()
-        self._cached_previous_block = None
-        self._cached_previous_hash = None
 
     def create_block(self, proof, previous_hash):
         block = {'index': len(self.chain) + 1,
-                 'timestamp': str(datetime.datetime.now()),
+                 'timestamp': time.time_ns(),  # Nanoseconds since the epoch; formatted only for display
                  'proof': proof,
                  'previous_hash': previous_hash,
                  'transactions': self.transactions}
+        self._block_hashes[block['index']] = (block, self._compute_hash(block))
         self.transactions = []
         self.chain.append(block)
-        # Clear cache when new block is added
-        self._cached_previous_block = None
-        self._cached_previous_hash = None
         return block
 
+    @property
+    def difficulty(self):
+        return self._difficulty
+
+    @difficulty.setter
+    def difficulty(self, value):
+        # Leading zero hex digits expressed on the raw digest: whole zero bytes plus an optional zero nibble
+        self._difficulty = value
+        self._zero_prefix = b'\x00' * (value // 2)
+        self._odd_nibble = value % 2 == 1
+        self.invalidate()  # Blocks validated under the old difficulty must be checked again
+
+    def invalidate(self):
+        """Forget the validated prefix so the next is_chain_valid rescans from genesis"""
+        # (chain list, digest of each validated block in order)
+        self._validated = None
+
     def get_previous_block(self):
-        if self._cached_previous_block is None:
-            self._cached_previous_block = self.chain[-1]
-        return self._cached_previous_block
+        return self.chain[-1]
 
     def get_previous_hash_cached(self):
-        if self._cached_previous_hash is None:
-            self._cached_previous_hash = self.hash(self.get_previous_block())
-        return self._cached_previous_hash
+        # The digest is memoised when the block is created (see hash), so this is O(1)
+        return self.hash(self.chain[-1])
 
     def proof_of_work(self, previous_proof):
+        # Native nonce search (OpenSSL extension, then numba) while the squares fit in int64
+        if 0 <= previous_proof < MAX_PREVIOUS_PROOF:
+            if _pow_lib is not None:
+                return _pow_lib.find_pow(previous_proof, self.difficulty)
+            find_proof = _numba_find_proof()
+            if find_proof is not None:
+                return int(find_proof(previous_proof, self.difficulty))
+
         new_proof = 1
-        check_proof = False
-        target = '0' * self.difficulty  # Use adjustable difficulty
-        while not check_proof:
-            hash_operation = hashlib.sha256(
-                str(new_proof ** 2 - previous_proof ** 2).encode()).hexdigest()
-            if hash_operation[:self.difficulty] == target:
-                check_proof = True
-            else:
-                new_proof += 1
-        return new_proof
+        previous_square = previous_proof * previous_proof
+        zero_prefix = self._zero_prefix
+        full_bytes = len(zero_prefix)
+        odd_nibble = self._odd_nibble
+        while True:
+            digest = _sha256(b'%d' % (new_proof * new_proof - previous_square)).digest()
+            if digest[:full_bytes] == zero_prefix and (not odd_nibble or digest[full_bytes] < 0x10):
+                return new_proof
+            new_proof += 1
+
+    def _digest_meets_difficulty(self, digest):
+        full_bytes = len(self._zero_prefix)
+        if digest[:full_bytes] != self._zero_prefix:
+            return False
+        return not self._odd_nibble or digest[full_bytes] < 0x10
 
     def hash(self, block):
-        encoded_block = json.dumps(block, sort_keys=True).encode()
-        return hashlib.sha256(encoded_block).hexdigest()
+        # Blocks are not modified once created, so digests of our own chain's blocks are memoised by index;
+        # the stored block is compared by identity, so a replaced chain or a foreign block never gets a stale digest
+        index = block['index']
+        cached = self._block_hashes.get(index)
+        if cached is not None and cached[0] is block:
+            return cached[1]
+        block_hash = self._compute_hash(block)
+        if 0 < index <= len(self.chain) and self.chain[index - 1] is block:
+            self._block_hashes[index] = (block, block_hash)
+        return block_hash
+
+    def _compute_hash(self, block):
+        # Feed the header fields in a fixed order; only the transaction list goes through (compact, key-sorted) JSON
+        hasher = _sha256(('%d|%s|%d|%s|' % (
+            block['index'], block['timestamp'], block['proof'], block['previous_hash'])).encode())
+        hasher.update(orjson.dumps(block['transactions'], option=orjson.OPT_SORT_KEYS))
+        return hasher.hexdigest()
 
     def is_chain_valid(self, chain):
-        previous_block = chain[0]
+        # Always recompute digests: validation must not trust a memoised or peer-supplied digest
+        try:
+            digests = [self._compute_hash(block) for block in chain]
+        except orjson.JSONEncodeError:  # e.g. a peer block with an integer beyond 64 bits
+            return False
+        # Our own chain skips the proof checks for its validated prefix, provided every block in it still
+        # hashes as it did when validated, so an in-place edit anywhere forces a full check; any other chain
+        # (e.g. from a peer) is always checked in full
+        own_chain = chain is self.chain
         block_index = 1
-        target = '0' * self.difficulty
+        if own_chain and self._validated is not None:
+            validated_chain, validated_digests = self._validated
+            if validated_chain is chain and digests[:len(validated_digests)] == validated_digests:
+                block_index = max(len(validated_digests), 1)
         while block_index < len(chain):
             block = chain[block_index]
-            if block['previous_hash'] != self.hash(previous_block):
+            if block['previous_hash'] != digests[block_index - 1]:
                 return False
-            previous_proof = previous_block['proof']
+            previous_proof = chain[block_index - 1]['proof']
             proof = block['proof']
-            hash_operation = hashlib.sha256(
-                str(proof ** 2 - previous_proof ** 2).encode()).hexdigest()
-            if hash_operation[:self.difficulty] != target:
+            digest = _sha256(b'%d' % (proof * proof - previous_proof * previous_proof)).digest()
+            if not self._digest_meets_difficulty(digest):
                 return False
-            previous_block = block
             block_index += 1
+        if own_chain:
+            self._validated = (chain, digests)
         return True
 
     def add_transaction(self, sender, receiver, amount, metadata=None):
-        # Optimize transaction data size with image metadata
-        transaction = {
-            's': sender[:8] if len(sender) > 8 else sender,  # Truncate sender ID
-            'r': receiver[:8] if len(receiver) > 8 else receiver,  # Truncate receiver ID
-            'a': amount,
-            'type': 'watermark' if metadata else 'mining',
-        }
-
-        # Add watermark-specific metadata
+        # Optimize transaction data size with image metadata; each shape is built in one literal
         if metadata:
-            transaction.update({
+            transaction = {
+                's': sender[:8],  # Truncate sender ID
+                'r': receiver[:8],  # Truncate receiver ID
+                'a': amount,
+                'type': 'watermark',
                 'img_hash': metadata.get('image_hash', '')[:16],  # Truncated image hash
                 'msg_hash': metadata.get('message_hash', '')[:16],  # Truncated message hash
                 'timestamp': metadata.get('created_at', ''),
                 'size': metadata.get('file_size', 0)
-            })
+            }
+        else:
+            transaction = {'s': sender[:8], 'r': receiver[:8], 'a': amount, 'type': 'mining'}
 
         self.transactions.append(transaction)
         previous_block = self.get_previous_block()
         return previous_block['index'] + 1
 
+    def add_transactions(self, transfers):
+        """Queue several plain transfers, given as (sender, receiver, amount) tuples, in one list operation"""
+        # Built in full first: extend() from a list is a single step, so a block being mined never sees half a batch
+        batch = [{'s': sender[:8], 'r': receiver[:8], 'a': amount, 'type': 'mining'}
+                 for sender, receiver, amount in transfers]
+        self.transactions.extend(batch)
+        previous_block = self.get_previous_block()
+        return previous_block['index'] + 1
+
     def batch_mine_pending_transactions(self):
         """Mine all pending transactions in a single block"""
         if not self.transactions:
@@ -117,15 +191,24 @@ class Blockchain:
         network = self.nodes
         longest_chain = None
         max_length = len(self.chain)
-        for node in network:
-            response = requests.get(f'http://{node}/get_chain')
-            if response.status_code == 200:
-                length = response.json()['length']
-                chain = response.json()['chain']
-                if length > max_length and self.is_chain_valid(chain):
-                    max_length = length
-                    longest_chain = chain
+        if not network:
+            return False
+        # Poll every peer concurrently; validation stays here since it is CPU-bound under the GIL
+        with ThreadPoolExecutor(max_workers=min(32, len(network))) as executor:
+            futures = [executor.submit(requests.get, f'http://{node}/get_chain', timeout=5) for node in network]
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                except requests.RequestException:
+                    continue  # Unreachable peers simply don't take part
+                if response.status_code == 200:
+                    length = response.json()['length']
+                    chain = response.json()['chain']
+                    if length > max_length and self.is_chain_valid(chain):
+                        max_length = length
+                        longest_chain = chain
         if longest_chain:
+            self._block_hashes = {}
             self.chain = longest_chain
             return True
         return False
@@ -1,107 +1,247 @@
-import json
-import time
+import asyncio
+import functools
+import logging
 
+import msgspec
+import orjson
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from converter.redis_timeseries import now_ms
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def _views():
+    # Resolved on first use rather than at import time to avoid circular imports
+    from converter import views
+    return views
+
+
+def _dumps(payload):
+    # orjson serialises to bytes; the browser and test clients JSON.parse text frames, so decode once here
+    return orjson.dumps(payload).decode()
+
+
+# Error frames only vary in their message, so they are formatted into fixed JSON templates
+_ERROR_FRAME = '{"type":"error","message":%s}'
+_MINING_ERROR_FRAME = '{"type":"mining_error","message":%s,"timestamp":%r}'
+
+# Clients that offer the 'msgpack' subprotocol get binary MessagePack frames instead of JSON text
+MSGPACK_SUBPROTOCOL = 'msgpack'
+_msgpack_encoder = msgspec.msgpack.Encoder()
+_msgpack_decoder = msgspec.msgpack.Decoder()
+
+# Group broadcasts arriving within this window are coalesced into a single frame
+BROADCAST_FLUSH_INTERVAL = 0.005
+MAX_BROADCAST_BATCH = 100
+
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-flight
+_background_tasks = set()
+
+
+def prepack(payload):
+    """Build a group_send event whose JSON is encoded once here rather than by every subscriber"""
+    return {'type': payload['type'], 'wire': _dumps(payload)}
+
+
+class BroadcastBuffer:
+    """Coalesce group broadcasts into one frame per flush window instead of one frame each"""
+
+    def __init__(self, send_text):
+        self._send_text = send_text
+        self._queue = asyncio.Queue()
+        self.closed = False
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    def put(self, event):
+        """Queue a group event, reusing its prepacked JSON when the producer supplied one"""
+        if not self.closed:
+            self._queue.put_nowait(event.get('wire') or _dumps(event))
+
+    async def _flush_loop(self):
+        while True:
+            items = [await self._queue.get()]
+            await asyncio.sleep(BROADCAST_FLUSH_INTERVAL)
+            while len(items) < MAX_BROADCAST_BATCH and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            # A lone broadcast keeps its own shape; clients unpack 'batch' frames into their items
+            try:
+                if len(items) == 1:
+                    await self._send_text(items[0])
+                else:
+                    await self._send_text('{"type":"batch","items":[%s]}' % ','.join(items))
+            except Exception as e:
+                # Typically the socket closing under us; nothing queued after this could be delivered either
+                logger.warning("WebSocket broadcast failed, dropping further broadcasts: %s", e)
+                self._discard()
+                return
+
+    def _discard(self):
+        """Stop accepting broadcasts and drop the queued ones"""
+        self.closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def close(self):
+        self._discard()
+        self._flusher.cancel()
+
+
+class MessageDispatchMixin:
+    """Route incoming client messages to the consumer method named for their 'type'"""
+    message_handlers = {}
+
+    async def dispatch_message(self, message_type):
+        handler = self.message_handlers.get(message_type)
+        if handler is None:
+            await self.send_error(f'Unknown message type: {message_type}')
+        else:
+            await getattr(self, handler)()
+
+
+class BlockchainConsumer(MessageDispatchMixin, AsyncWebsocketConsumer):
+    message_handlers = {
+        'get_blockchain': 'send_blockchain_update',
+        'get_stats': 'send_blockchain_stats',
+    }
 
-class BlockchainConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(args, kwargs)
         self.room_group_name = None
+        self.use_msgpack = False
+        self.broadcasts = None
+        # Length and tip hash of the chain this client already holds
+        self.known_length = 0
+        self.known_tip = None
 
     async def connect(self):
         self.room_group_name = 'blockchain_updates'
+        self.broadcasts = BroadcastBuffer(self.send_text)
 
-        # Join room group
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
-
-        await self.accept()
+        self.use_msgpack = MSGPACK_SUBPROTOCOL in self.scope.get('subprotocols', ())
+        await self.accept(MSGPACK_SUBPROTOCOL if self.use_msgpack else None)
 
-        # Send initial blockchain data
-        await self.send_blockchain_update()
+        # Join room group while the initial blockchain data goes out; group messages are
+        # only dispatched once connect() returns, so none can overtake the snapshot
+        await asyncio.gather(
+            self.channel_layer.group_add(self.room_group_name, self.channel_name),
+            self.send_blockchain_update()
+        )
 
     async def disconnect(self, close_code):
+        self.broadcasts.close()
+
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         try:
-            data = json.loads(text_data)
-            message_type = data.get('type')
-
-            if message_type == 'get_blockchain':
-                await self.send_blockchain_update()
-            elif message_type == 'get_stats':
-                await self.send_blockchain_stats()
-        except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'message': 'Invalid JSON data'
-            }))
+            if bytes_data is not None:
+                data = _msgpack_decoder.decode(bytes_data)
+            else:
+                data = orjson.loads(text_data)
+            await self.dispatch_message(data.get('type'))
+        except (orjson.JSONDecodeError, msgspec.DecodeError):
+            await self.send_error('Invalid JSON data')
+
+    async def send_payload(self, payload):
+        """Send a message in the encoding negotiated on connect"""
+        if self.use_msgpack:
+            await self.send(bytes_data=_msgpack_encoder.encode(payload))
+        else:
+            await self.send(text_data=_dumps(payload))
+
+    async def send_text(self, text):
+        """Send already-encoded JSON, converting it for MessagePack clients"""
+        if self.use_msgpack:
+            await self.send(bytes_data=_msgpack_encoder.encode(orjson.loads(text)))
+        else:
+            await self.send(text_data=text)
+
+    async def send_error(self, message):
+        await self.send_text(_ERROR_FRAME % _dumps(message))
 
     async def send_blockchain_update(self):
-        """Send current blockchain data to WebSocket"""
+        """Send the blocks this client has not seen yet; the whole chain on first send or after a reorg"""
         try:
-            # Import here to avoid circular imports
-            from converter.views import blockchain
-
-            await self.send(text_data=json.dumps({
-                'type': 'blockchain_update',
-                'chain': blockchain.chain,
-                'length': len(blockchain.chain),
-                'timestamp': time.time()
-            }))
+            views = _views()
+            blockchain = views.blockchain
+
+            chain = blockchain.chain
+            start = self.known_length
+            if start > len(chain) or (start and blockchain.hash(chain[start - 1]) != self.known_tip):
+                start = 0
+
+            if start == 0 and not self.use_msgpack:
+                # Splice the cached chain JSON in rather than re-serialising it for every client
+                length, chain_json = views.get_chain_json()
+                await self.send(text_data='{"type":"blockchain_update","from":0,"length":%d,"timestamp":%s,"chain":%s}'
+                                          % (length, _dumps(now_ms() / 1000), chain_json))
+            else:
+                length = len(chain)
+                await self.send_payload({
+                    'type': 'blockchain_update',
+                    'from': start,
+                    'chain': chain[start:length],
+                    'length': length,
+                    'timestamp': now_ms() / 1000
+                })
+
+            self.known_length = length
+            self.known_tip = blockchain.hash(chain[length - 1])
         except Exception as e:
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'message': f'Failed to get blockchain data: {str(e)}'
-            }))
+            await self.send_error(f'Failed to get blockchain data: {str(e)}')
 
     async def send_blockchain_stats(self):
         """Send blockchain statistics"""
         try:
-            from converter.views import blockchain
+            blockchain = _views().blockchain
 
-            await self.send(text_data=json.dumps({
+            await self.send_payload({
                 'type': 'blockchain_stats',
                 'chain_length': len(blockchain.chain),
                 'pending_transactions': len(blockchain.transactions),
                 'difficulty': blockchain.difficulty,
-                'timestamp': time.time()
-            }))
+                'timestamp': now_ms() / 1000
+            })
         except Exception as e:
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'message': f'Failed to get stats: {str(e)}'
-            }))
+            await self.send_error(f'Failed to get stats: {str(e)}')
 
     # Receive message from room group
     async def blockchain_update(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'blockchain_update',
-            'message': event['message'],
-            'data': event.get('data', {})
-        }))
+        if 'wire' in event:
+            self.broadcasts.put(event)
+        else:
+            self.broadcasts.put({
+                'type': 'blockchain_update',
+                'message': event['message'],
+                'data': event.get('data', {})
+            })
+
 
+class MiningConsumer(MessageDispatchMixin, AsyncWebsocketConsumer):
+    message_handlers = {
+        'start_mining': 'start_async_mining',
+    }
 
-class MiningConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_group_name = 'mining_updates'
+        self.broadcasts = BroadcastBuffer(self.send_text)
+
+        # Complete the handshake before the channel layer round trip
+        await self.accept()
 
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
 
-        await self.accept()
-
     async def disconnect(self, close_code):
+        self.broadcasts.close()
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
@@ -109,104 +249,89 @@ class MiningConsumer(AsyncWebsocketConsumer):
 
     async def receive(self, text_data):
         try:
-            data = json.loads(text_data)
-            message_type = data.get('type')
+            data = orjson.loads(text_data)
+            await self.dispatch_message(data.get('type'))
+        except orjson.JSONDecodeError:
+            await self.send_error('Invalid JSON data')
+
+    async def send_payload(self, payload):
+        await self.send(text_data=_dumps(payload))
+
+    async def send_text(self, text):
+        await self.send(text_data=text)
+
+    async def send_error(self, message):
+        await self.send(text_data=_ERROR_FRAME % _dumps(message))
 
-            if message_type == 'start_mining':
-                await self.start_async_mining()
-        except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'message': 'Invalid JSON data'
-            }))
+    async def send_mining_error(self, message):
+        await self.send(text_data=_MINING_ERROR_FRAME % (_dumps(message), now_ms() / 1000))
 
     async def start_async_mining(self):
         """Start asynchronous mining process"""
         try:
-            from converter.views import blockchain, node_address
-
             # Send mining started notification
-            await self.send(text_data=json.dumps({
+            await self.send_payload({
                 'type': 'mining_started',
                 'message': 'Mining process initiated...',
-                'timestamp': time.time()
-            }))
+                'timestamp': now_ms() / 1000
+            })
 
             # Perform mining in background
             await self.perform_mining()
         except Exception as e:
-            await self.send(text_data=json.dumps({
-                'type': 'mining_error',
-                'message': f'Mining startup failed: {str(e)}',
-                'timestamp': time.time()
-            }))
+            await self.send_mining_error(f'Mining startup failed: {str(e)}')
 
     async def perform_mining(self):
         """Perform actual mining operation"""
         try:
-            from converter.views import blockchain, node_address, async_mine_block
-            import threading
+            views = _views()
+            blockchain = views.blockchain
 
             # Add a transaction if none exist
             if not blockchain.transactions:
-                blockchain.add_transaction(sender=node_address, receiver='WebSocket', amount=1)
+                blockchain.add_transaction(sender=views.node_address, receiver='WebSocket', amount=1)
 
             # Send progress update
-            await self.send(text_data=json.dumps({
+            await self.send_payload({
                 'type': 'mining_progress',
                 'message': f'Mining block with {len(blockchain.transactions)} transactions...',
                 'pending_transactions': len(blockchain.transactions),
-                'timestamp': time.time()
-            }))
-
-            # Start mining in background thread
-            def mine_and_notify():
-                try:
-                    # Call the actual mining function
-                    async_mine_block()
-
-                    # Send completion notification via WebSocket
-                    import asyncio
-                    from channels.layers import get_channel_layer
-                    from asgiref.sync import async_to_sync
-
-                    channel_layer = get_channel_layer()
-                    if channel_layer:
-                        async_to_sync(channel_layer.group_send)(
-                            'mining_updates',
-                            {
-                                'type': 'mining_complete',
-                                'message': f'Block successfully mined! Chain length: {len(blockchain.chain)}',
-                                'chain_length': len(blockchain.chain),
-                                'pending_transactions': len(blockchain.transactions)
-                            }
-                        )
-                except Exception as e:
-                    # Send error notification
-                    async_to_sync(channel_layer.group_send)(
-                        'mining_updates',
-                        {
-                            'type': 'mining_error',
-                            'message': f'Mining failed: {str(e)}'
-                        }
-                    )
-
-            # Start mining in background
-            threading.Thread(target=mine_and_notify, daemon=True).start()
+                'timestamp': now_ms() / 1000
+            })
+
+            # Mine on the shared miner so this consumer keeps handling messages meanwhile
+            task = asyncio.create_task(self.mine_and_notify())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        except Exception as e:
+            await self.send_mining_error(f'Mining failed: {str(e)}')
 
+    async def mine_and_notify(self):
+        """Run the actual mining function off the event loop and broadcast the outcome"""
+        views = _views()
+        blockchain = views.blockchain
+        try:
+            # Joins a run already queued on the views' miner rather than mining on a thread of its own
+            await asyncio.wrap_future(views.schedule_mining())
+            event = prepack({
+                'type': 'mining_complete',
+                'message': f'Block successfully mined! Chain length: {len(blockchain.chain)}',
+                'chain_length': len(blockchain.chain),
+                'pending_transactions': len(blockchain.transactions)
+            })
         except Exception as e:
-            await self.send(text_data=json.dumps({
+            event = prepack({
                 'type': 'mining_error',
-                'message': f'Mining failed: {str(e)}',
-                'timestamp': time.time()
-            }))
+                'message': f'Mining failed: {str(e)}'
+            })
+        await self.channel_layer.group_send('mining_updates', event)
 
     # Receive message from room group
     async def mining_update(self, event):
-        await self.send(text_data=json.dumps(event))
+        self.broadcasts.put(event)
 
     async def mining_complete(self, event):
-        await self.send(text_data=json.dumps(event))
+        self.broadcasts.put(event)
 
     async def mining_error(self, event):
-        await self.send(text_data=json.dumps(event))
+        self.broadcasts.put(event)
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-15 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("converter", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="image",
+            name="block_index",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="image",
+            name="blockchain_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-15 01:29
+
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("converter", "0002_drop_duplicate_image_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="image",
+            index=models.Index(
+                fields=["block_index", "blockchain_hash"],
+                include=("image", "watermarked_image"),
+                name="img_bi_bh_cov",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="image",
+            name="converter_i_block_i_301557_idx",
+        ),
+    ]
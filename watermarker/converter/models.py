@@ -8,14 +8,16 @@ class Image(models.Model):
     watermarked_image = models.ImageField(upload_to='watermarked_images/', blank=True, null=True)
     secret_message = models.TextField(blank=True, null=True)
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    block_index = models.IntegerField(blank=True, null=True, db_index=True)
-    blockchain_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    block_index = models.IntegerField(blank=True, null=True)
+    blockchain_hash = models.CharField(max_length=64, blank=True, null=True)
 
     def __str__(self):
         return f"Image {self.id} - {self.image.name}"
 
     class Meta:
         indexes = [
-            models.Index(fields=['block_index']),
+            # Also serves block_index-only lookups; INCLUDE lets PostgreSQL answer image lookups index-only
+            models.Index(fields=['block_index', 'blockchain_hash'], include=['image', 'watermarked_image'],
+                         name='img_bi_bh_cov'),
             models.Index(fields=['blockchain_hash']),
         ]
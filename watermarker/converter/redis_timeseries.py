@@ -2,23 +2,74 @@
 Redis TimeSeries integration for watermarking/blockchain metrics
 Provides high-performance time series data storage and querying
 """
-import json
+import functools
 import logging
 import os
+import socket
+import threading
 import time
-from typing import Optional, List, Dict, Any
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Tuple
 
+import msgspec
+import numpy as np
 import redis
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+_msgpack_encoder = msgspec.msgpack.Encoder()
+
+# Probe idle sockets so long-lived workers notice dead connections instead of stalling on them
+_KEEPALIVE_OPTIONS = {
+    option: value
+    for option, value in ((getattr(socket, 'TCP_KEEPIDLE', None), 30),
+                          (getattr(socket, 'TCP_KEEPINTVL', None), 10),
+                          (getattr(socket, 'TCP_KEEPCNT', None), 3))
+    if option is not None
+}
+
+# [wall-clock ms, monotonic time it was read]; refreshed at most once per millisecond
+_now_ms_cache = [0, float('-inf')]
+
+
+def now_ms() -> int:
+    """Wall-clock time in milliseconds, reused by everything recorded within the same millisecond"""
+    now = time.monotonic()
+    cache = _now_ms_cache
+    if now - cache[1] >= 0.001:
+        cache[0] = int(time.time() * 1000)
+        cache[1] = now
+    return cache[0]
+
+
+# (timestamp, value) rows; indexing a row with [0]/[1] behaves like the tuples this replaced
+SAMPLE_DTYPE = np.dtype([('timestamp', np.int64), ('value', np.float64)])
+
+
+def _parse_samples(samples) -> np.ndarray:
+    """Convert [[timestamp, value], ...] replies with one vectorised cast per column"""
+    parsed = np.empty(len(samples), dtype=SAMPLE_DTYPE)
+    if samples:
+        raw = np.array(samples, dtype=str)
+        parsed['timestamp'] = raw[:, 0].astype(np.int64)
+        parsed['value'] = raw[:, 1].astype(np.float64)
+    return parsed
+
 
 class RedisTimeSeriesManager:
+    # Samples are buffered and written with one TS.MADD once either limit is reached
+    FLUSH_SIZE = 64
+    FLUSH_INTERVAL = 0.05
+
     def __init__(self):
         self.redis_client = None
         self.timeseries_available = False
         self._connection_attempted = False
+        self._pending = []  # (key, timestamp, value, labels)
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher = None
 
     def _get_redis_connection(self):
         """Lazy Redis connection with development/testing fallback"""
@@ -32,14 +83,21 @@ class RedisTimeSeriesManager:
             redis_host = 'redis' if os.environ.get('DOCKER_ENV') else 'localhost'
             redis_password = getattr(settings, 'REDIS_PASSWORD', None)
 
-            self.redis_client = redis.Redis(
+            # Shared by the request threads and the flush thread; callers wait for a free connection
+            pool = redis.BlockingConnectionPool(
                 host=redis_host,
                 port=6379,
                 password=redis_password,
                 decode_responses=True,
+                max_connections=32,
+                timeout=5,
                 socket_connect_timeout=2,  # Quick timeout for tests
-                socket_timeout=2
+                socket_timeout=2,
+                socket_keepalive=True,
+                socket_keepalive_options=_KEEPALIVE_OPTIONS,
+                retry_on_timeout=True
             )
+            self.redis_client = redis.Redis(connection_pool=pool)
 
             # Test the connection
             self.redis_client.ping()
@@ -59,19 +117,23 @@ class RedisTimeSeriesManager:
             return False
 
         try:
-            # Try to execute a simple TimeSeries command
-            self.redis_client.execute_command('TS.INFO', 'test_availability_check')
-        except redis.exceptions.ResponseError as e:
-            if "unknown command" in str(e).lower():
-                logger.warning("Redis TimeSeries module not available. Falling back to regular Redis operations.")
-                return False
-            elif "TSDB: the key does not exist" in str(e):
-                # This means TimeSeries is available but the key doesn't exist
-                return True
+            modules = self.redis_client.module_list() or []
         except Exception as e:
             logger.error(f"Error checking TimeSeries availability: {e}")
             return False
-        return True
+
+        for module in modules:
+            # RESP2 replies are flat [name, value, ...] lists, RESP3 replies are maps
+            if not isinstance(module, dict):
+                module = dict(zip(module[::2], module[1::2]))
+            name = module.get('name', module.get(b'name', b''))
+            if isinstance(name, bytes):
+                name = name.decode()
+            if name.lower() == 'timeseries':
+                return True
+
+        logger.warning("Redis TimeSeries module not available. Falling back to regular Redis operations.")
+        return False
 
     def create_time_series(self, key: str, retention_ms: int = 3600000, labels: Dict[str, str] = None):
         """Create a new time series with optional labels and retention policy"""
@@ -82,30 +144,120 @@ class RedisTimeSeriesManager:
         if not self.timeseries_available:
             # Fallback: just set a marker in regular Redis
             try:
-                client.set(f"ts_fallback:{key}", json.dumps(labels or {}))
+                client.set(f"ts_fallback:{key}", _msgpack_encoder.encode(labels or {}))
                 return True
             except Exception as e:
                 logger.error(f"Failed to create fallback time series {key}: {e}")
                 return False
 
         try:
-            # Use TS.CREATE with retention and labels
-            cmd = ['TS.CREATE', key, 'RETENTION', retention_ms]
-            if labels:
-                for label_key, label_value in labels.items():
-                    cmd.extend(['LABELS', label_key, label_value])
-
-            client.execute_command(*cmd)
+            client.execute_command(*self._create_command(key, retention_ms, labels))
             return True
         except redis.exceptions.ResponseError as e:
             if "TSDB: key already exists" in str(e):
                 return True  # Key exists, that's fine
             raise e
 
+    @staticmethod
+    def _create_command(key: str, retention_ms: int, labels: Dict[str, str] = None) -> list:
+        """TS.CREATE with retention and labels; LABELS is given once, followed by every pair"""
+        cmd = ['TS.CREATE', key, 'RETENTION', retention_ms]
+        if labels:
+            cmd.append('LABELS')
+            for label_key, label_value in labels.items():
+                cmd.extend([label_key, label_value])
+        return cmd
+
+    def create_time_series_batch(self, specs: List[Tuple[str, int, Dict[str, str]]]):
+        """Create several time series in one round trip; specs are (key, retention_ms, labels)"""
+        client = self._get_redis_connection()
+        if not client:
+            return False
+
+        pipe = client.pipeline(transaction=False)
+        for key, retention_ms, labels in specs:
+            if self.timeseries_available:
+                pipe.execute_command(*self._create_command(key, retention_ms, labels))
+            else:
+                # Fallback: just set a marker in regular Redis
+                pipe.set(f"ts_fallback:{key}", _msgpack_encoder.encode(labels or {}))
+        return self._execute_batch(pipe, "TSDB: key already exists")
+
+    def create_rule_batch(self, rules: List[Tuple[str, str, str, int]]):
+        """Create several downsampling rules in one round trip; rules are
+        (source_key, dest_key, aggregation_type, bucket_duration)"""
+        if not self.timeseries_available:
+            logger.debug(f"Skipping creation of {len(rules)} rules (TimeSeries not available)")
+            return True
+
+        client = self._get_redis_connection()
+        if not client:
+            return False
+
+        pipe = client.pipeline(transaction=False)
+        # Destination series first; the pipeline preserves command order
+        for source_key, dest_key, aggregation_type, bucket_duration in rules:
+            pipe.execute_command(*self._create_command(dest_key, 86400000))  # 24 hour retention for aggregated data
+        for source_key, dest_key, aggregation_type, bucket_duration in rules:
+            pipe.execute_command('TS.CREATERULE', source_key, dest_key,
+                                 'AGGREGATION', aggregation_type, bucket_duration)
+        return self._execute_batch(pipe,
+                                   "TSDB: key already exists",
+                                   "TSDB: compaction rule already exists",
+                                   "TSDB: the destination key already has a src rule")
+
+    @staticmethod
+    def _execute_batch(pipe, *accepted_errors):
+        """Run a pipeline, treating per-command errors that mean 'already exists' as success"""
+        try:
+            results = pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logger.error(f"Error executing batched TimeSeries commands: {e}")
+            return False
+
+        success = True
+        for result in results:
+            if isinstance(result, Exception) and not any(error_msg in str(result) for error_msg in accepted_errors):
+                logger.error(f"Error in batched TimeSeries command: {result}")
+                success = False
+        return success
+
     def add_sample(self, key: str, value: float, timestamp: Optional[int] = None, labels: Dict[str, str] = None):
-        """Add a sample to a time series"""
+        """Buffer a sample for a time series; buffered samples are written in batches by flush()"""
         if timestamp is None:
-            timestamp = int(time.time() * 1000)  # Convert to milliseconds
+            timestamp = now_ms()
+
+        client = self._get_redis_connection()
+        if not client:
+            return False
+
+        with self._pending_lock:
+            self._pending.append((key, timestamp, value, labels))
+            due = len(self._pending) >= self.FLUSH_SIZE or time.monotonic() - self._last_flush > self.FLUSH_INTERVAL
+            # Checked and started under the lock, so concurrent first samples start a single flusher
+            if self._flusher is None:
+                self._start_flusher()
+        if due:
+            self.flush()
+        return True
+
+    def _start_flusher(self):
+        """Flush samples left in an idle buffer from a background thread"""
+        def run():
+            while True:
+                time.sleep(self.FLUSH_INTERVAL)
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name='redis-timeseries-flush', daemon=True)
+        self._flusher.start()
+
+    def flush(self):
+        """Write all buffered samples in a single round trip"""
+        with self._pending_lock:
+            samples, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if not samples:
+            return True
 
         client = self._get_redis_connection()
         if not client:
@@ -113,31 +265,46 @@ class RedisTimeSeriesManager:
 
         if not self.timeseries_available:
             # Fallback: store latest value in regular Redis hash
-            client.hset(f"ts_fallback_data:{key}", "value", value, "timestamp", timestamp)
-            return True
+            pipe = client.pipeline(transaction=False)
+            latest = {}
+            for key, timestamp, value, labels in samples:
+                latest[key] = {"value": value, "timestamp": timestamp}
+            # Only the latest sample per key survives, so write each hash once
+            for key, fields in latest.items():
+                pipe.hset(f"ts_fallback_data:{key}", mapping=fields)
+            try:
+                pipe.execute()
+                return True
+            except Exception as e:
+                logger.error(f"Error flushing {len(latest)} fallback samples: {e}")
+                return False
 
         try:
-            # Try to add sample, create series if it doesn't exist
-            try:
-                client.execute_command('TS.ADD', key, timestamp, value)
-            except redis.exceptions.ResponseError as e:
-                if "TSDB: the key does not exist" in str(e):
-                    # Create the series and try again
-                    self.create_time_series(key, labels=labels)
-                    client.execute_command('TS.ADD', key, timestamp, value)
-                else:
-                    raise e
+            cmd = ['TS.MADD']
+            for key, timestamp, value, labels in samples:
+                cmd.extend((key, timestamp, value))
+            results = client.execute_command(*cmd)
+
+            # TS.MADD reports failures per sample; create missing series and retry those samples
+            for (key, timestamp, value, labels), result in zip(samples, results):
+                if isinstance(result, redis.exceptions.ResponseError):
+                    if "TSDB: the key does not exist" in str(result):
+                        self.create_time_series(key, labels=labels)
+                        client.execute_command('TS.ADD', key, timestamp, value)
+                    else:
+                        logger.error(f"Error adding sample to {key}: {result}")
             return True
         except Exception as e:
-            logger.error(f"Error adding sample to {key}: {e}")
+            logger.error(f"Error flushing {len(samples)} samples: {e}")
             return False
 
     def get_range(self, key: str, from_time: int, to_time: int,
-                  aggregation_type: str = None, bucket_duration: int = None) -> List[tuple]:
-        """Get time series data within a time range with optional aggregation"""
+                  aggregation_type: str = None, bucket_duration: int = None) -> np.ndarray:
+        """Get time series data within a time range with optional aggregation, as a SAMPLE_DTYPE array"""
+        self.flush()
         client = self._get_redis_connection()
-        if not client:
-            return []
+        if not client or not self.timeseries_available:  # Fallback mode keeps no history to query
+            return _parse_samples([])
 
         try:
             cmd = ['TS.RANGE', key, from_time, to_time]
@@ -146,15 +313,20 @@ class RedisTimeSeriesManager:
                 cmd.extend(['AGGREGATION', aggregation_type, bucket_duration])
 
             result = client.execute_command(*cmd)
-            return [(int(ts), float(value)) for ts, value in result]
+            return _parse_samples(result)
+        except redis.exceptions.ResponseError as e:
+            if "TSDB: the key does not exist" not in str(e):  # A series with no samples yet is not an error
+                logger.warning(f"Error getting range for {key}: {e}")
+            return _parse_samples([])
         except Exception as e:
-            print(f"Error getting range for {key}: {e}")
-            return []
+            logger.warning(f"Error getting range for {key}: {e}")
+            return _parse_samples([])
 
     def get_latest(self, key: str) -> Optional[tuple]:
         """Get the latest sample from a time series"""
+        self.flush()
         client = self._get_redis_connection()
-        if not client:
+        if not client or not self.timeseries_available:  # Fallback mode keeps no history to query
             return None
 
         try:
@@ -162,24 +334,31 @@ class RedisTimeSeriesManager:
             if result:
                 return (int(result[0]), float(result[1]))
             return None
+        except redis.exceptions.ResponseError as e:
+            if "TSDB: the key does not exist" not in str(e):
+                logger.warning(f"Error getting latest for {key}: {e}")
+            return None
         except Exception as e:
-            print(f"Error getting latest for {key}: {e}")
+            logger.warning(f"Error getting latest for {key}: {e}")
             return None
 
     def multi_get(self, filter_expr: str) -> Dict[str, tuple]:
         """Get latest values from multiple time series matching a filter"""
+        self.flush()
         client = self._get_redis_connection()
-        if not client:
+        if not client or not self.timeseries_available:  # Fallback mode keeps no history to query
             return {}
 
         try:
             result = client.execute_command('TS.MGET', 'FILTER', filter_expr)
-            return {
-                key: (int(timestamp), float(value)) if timestamp and value else None
-                for key, labels, timestamp, value in result
-            }
+            if not result:
+                return {}
+            # Each reply entry is [key, labels, [timestamp, value]]; the sample is empty for a series with no data
+            entries = [(key, sample) for key, labels, sample in result]
+            latest = iter(_parse_samples([sample for key, sample in entries if sample]).tolist())
+            return {key: next(latest) if sample else None for key, sample in entries}
         except Exception as e:
-            print(f"Error in multi_get with filter {filter_expr}: {e}")
+            logger.warning(f"Error in multi_get with filter {filter_expr}: {e}")
             return {}
 
     def create_rule(self, source_key: str, dest_key: str, aggregation_type: str, bucket_duration: int):
@@ -221,6 +400,29 @@ class RedisTimeSeriesManager:
 redis_ts = RedisTimeSeriesManager()
 
 
+# Every metric series with its labels; gauges and histograms also get downsampled copies
+METRICS = MappingProxyType({
+    'blockchain:length': {'type': 'gauge', 'unit': 'blocks'},
+    'blockchain:pending_transactions': {'type': 'gauge', 'unit': 'count'},
+    'blockchain:mining_duration': {'type': 'histogram', 'unit': 'seconds'},
+    'blockchain:operations': {'type': 'counter', 'unit': 'operations'},
+    'watermark:operations': {'type': 'counter', 'unit': 'operations'},
+    'watermark:processing_time': {'type': 'histogram', 'unit': 'seconds'},
+    'system:cpu_usage': {'type': 'gauge', 'unit': 'percent'},
+    'system:memory_usage': {'type': 'gauge', 'unit': 'bytes'},
+    'stress:operations_per_second': {'type': 'gauge', 'unit': 'ops/sec'},
+    'stress:error_rate': {'type': 'gauge', 'unit': 'percent'},
+    'stress:concurrent_operations': {'type': 'gauge', 'unit': 'count'},
+    'blockchain:hash_rate': {'type': 'gauge', 'unit': 'hashes/sec'},
+    'blockchain:difficulty': {'type': 'gauge', 'unit': 'difficulty'},
+    'watermark:queue_depth': {'type': 'gauge', 'unit': 'count'}
+})
+DOWNSAMPLED_TYPES = frozenset({'gauge', 'histogram'})
+# Suffix and bucket: 30-second aggregations for real-time monitoring, 1- and 5-minute averages,
+# and 1-hour aggregations for long-term trends
+DOWNSAMPLING_BUCKETS = (('30s', 30000), ('1min', 60000), ('5min', 300000), ('1h', 3600000))
+
+
 class BlockchainMetricsCollector:
     """Collector for blockchain-specific metrics using Redis TimeSeries"""
 
@@ -230,37 +432,15 @@ class BlockchainMetricsCollector:
 
     def _initialize_time_series(self):
         """Initialize all time series with proper labels and retention"""
-        metrics = {
-            'blockchain:length': {'type': 'gauge', 'unit': 'blocks'},
-            'blockchain:pending_transactions': {'type': 'gauge', 'unit': 'count'},
-            'blockchain:mining_duration': {'type': 'histogram', 'unit': 'seconds'},
-            'blockchain:operations': {'type': 'counter', 'unit': 'operations'},
-            'watermark:operations': {'type': 'counter', 'unit': 'operations'},
-            'watermark:processing_time': {'type': 'histogram', 'unit': 'seconds'},
-            'system:cpu_usage': {'type': 'gauge', 'unit': 'percent'},
-            'system:memory_usage': {'type': 'gauge', 'unit': 'bytes'},
-            'stress:operations_per_second': {'type': 'gauge', 'unit': 'ops/sec'},
-            'stress:error_rate': {'type': 'gauge', 'unit': 'percent'},
-            'stress:concurrent_operations': {'type': 'gauge', 'unit': 'count'},
-            'blockchain:hash_rate': {'type': 'gauge', 'unit': 'hashes/sec'},
-            'blockchain:difficulty': {'type': 'gauge', 'unit': 'difficulty'},
-            'watermark:queue_depth': {'type': 'gauge', 'unit': 'count'}
-        }
+        # Create with 24-hour retention for detailed metrics
+        self.ts_manager.create_time_series_batch([(key, 86400000, labels) for key, labels in METRICS.items()])
 
-        for key, labels in metrics.items():
-            # Create with 24-hour retention for detailed metrics
-            self.ts_manager.create_time_series(key, retention_ms=86400000, labels=labels)
-
-            # Create downsampling rules for high-frequency metrics
-            if labels['type'] in ['gauge', 'histogram']:
-                # 30-second aggregations for real-time monitoring
-                self.ts_manager.create_rule(key, f"{key}:30s", "AVG", 30000)
-                # 1-minute averages
-                self.ts_manager.create_rule(key, f"{key}:1min", "AVG", 60000)
-                # 5-minute averages
-                self.ts_manager.create_rule(key, f"{key}:5min", "AVG", 300000)
-                # 1-hour aggregations for long-term trends
-                self.ts_manager.create_rule(key, f"{key}:1h", "AVG", 3600000)
+        # Create downsampling rules for high-frequency metrics
+        self.ts_manager.create_rule_batch([
+            (key, f"{key}:{suffix}", "AVG", bucket_duration)
+            for key, labels in METRICS.items() if labels['type'] in DOWNSAMPLED_TYPES
+            for suffix, bucket_duration in DOWNSAMPLING_BUCKETS
+        ])
 
     def record_blockchain_length(self, length: int):
         """Record current blockchain length"""
@@ -290,7 +470,7 @@ class BlockchainMetricsCollector:
         latest_metrics = self.ts_manager.multi_get('type=gauge')
 
         # Get recent trends (last 5 minutes)
-        current_time = int(time.time() * 1000)
+        current_time = now_ms()
         five_min_ago = current_time - (5 * 60 * 1000)
 
         trends = {}
@@ -310,5 +490,7 @@ class BlockchainMetricsCollector:
         }
 
 
-# Global metrics collector instance
-blockchain_metrics = BlockchainMetricsCollector()
+@functools.cache
+def get_blockchain_metrics() -> BlockchainMetricsCollector:
+    """Global metrics collector, created on first use so importing this module does no Redis I/O"""
+    return BlockchainMetricsCollector()
@@ -0,0 +1,90 @@
+"""
+Vectorised LSB steganography, bit-compatible with ``stegano.lsb``.
+
+The message is stored as ``b'<length>:' + message``, each byte most
+significant bit first, in the least significant bits of the R, G and B
+channels of consecutive pixels (row-major, alpha untouched), zero-padded to a
+whole pixel. That is exactly what ``lsb.hide`` writes for
+Latin-1 text, so images from either implementation reveal with the other.
+Here the payload is UTF-8, so non-Latin-1 text round-trips too.
+"""
+import contextlib
+
+import numpy as np
+from PIL import Image as PILImage
+
+# Longest length prefix scanned for (plus its ':'), in bytes
+_MAX_HEADER = 20
+
+
+@contextlib.contextmanager
+def _rgb_image(image):
+    """Open ``image`` (a path, file or PIL image) as RGB/RGBA for reading, closing it afterwards if we opened it."""
+    opened = None if isinstance(image, PILImage.Image) else PILImage.open(image)
+    source = image if opened is None else opened
+    try:
+        yield source if source.mode in ('RGB', 'RGBA') else source.convert('RGB')
+    finally:
+        if opened is not None:
+            opened.close()
+
+
+def _head(image, count):
+    """Array of the leading rows holding the first ``count`` pixels, plus a one-pixel-per-row view of it."""
+    rows = -(-count // image.width)
+    head = np.array(image.crop((0, 0, image.width, rows)))
+    return head, head.reshape(-1, head.shape[-1])
+
+
+def hide(image, message):
+    """Hide ``message`` in the LSBs of ``image`` (a path, file or PIL image); return a new PIL image."""
+    if not message:
+        raise ValueError('Message length is zero')
+    payload = message.encode('utf-8')
+    bits = np.unpackbits(np.frombuffer(b'%d:' % len(payload) + payload, dtype=np.uint8))
+    used = -(-bits.size // 3)
+
+    if isinstance(image, PILImage.Image):
+        # Never modify the caller's image
+        encoded = image.copy() if image.mode in ('RGB', 'RGBA') else image.convert('RGB')
+    else:
+        # Decoded here, so the message goes into this one pixel buffer; load() closes a file opened by name
+        encoded = PILImage.open(image)
+        encoded.load()
+        if encoded.mode not in ('RGB', 'RGBA'):
+            encoded = encoded.convert('RGB')
+    if used > encoded.width * encoded.height:
+        raise ValueError(f'The message you want to hide is too long: {len(message)}')
+
+    # Only the leading rows carry the message; the rest of the image is untouched
+    head, pixels = _head(encoded, used)
+    lsbs = np.zeros(used * 3, dtype=np.uint8)
+    lsbs[:bits.size] = bits
+    pixels[:used, :3] = (pixels[:used, :3] & 0xFE) | lsbs.reshape(used, 3)
+    encoded.paste(PILImage.fromarray(head, mode=encoded.mode), (0, 0))
+    return encoded
+
+
+def reveal(image):
+    """Return the message hidden in ``image`` (a path, file or PIL image) by :func:`hide` or ``lsb.hide``."""
+    with _rgb_image(image) as source:
+        capacity = source.width * source.height
+
+        def read_bytes(count):
+            used = -(-count * 8 // 3)
+            if used > capacity:
+                raise ValueError('Impossible to detect message.')
+            _, pixels = _head(source, used)
+            return np.packbits((pixels[:used, :3] & 1).reshape(-1)[:count * 8]).tobytes()
+
+        header = read_bytes(min(_MAX_HEADER, capacity * 3 // 8))
+        length, colon, _ = header.partition(b':')
+        if not colon or not length.isdigit():
+            raise ValueError('Impossible to detect message.')
+
+        start = len(length) + 1
+        payload = read_bytes(start + int(length))[start:]
+    try:
+        return payload.decode('utf-8')
+    except UnicodeDecodeError:  # Latin-1 text hidden by stegano
+        return payload.decode('latin-1')
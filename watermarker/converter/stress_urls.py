@@ -0,0 +1,13 @@
+from django.urls import path
+
+from .views import (
+    stress_test_mining, stress_test_watermarking, stress_test_combined,
+    stress_test_pending_transactions
+)
+
+urlpatterns = [
+    path('stress-test/mining/', stress_test_mining, name='stress_test_mining'),
+    path('stress-test/watermarking/', stress_test_watermarking, name='stress_test_watermarking'),
+    path('stress-test/combined/', stress_test_combined, name='stress_test_combined'),
+    path('stress-test/pending/', stress_test_pending_transactions, name='stress_test_pending_transactions'),
+]
@@ -0,0 +1,21 @@
+import io
+import secrets
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+
+from converter import stego
+from .models import Image
+
+
+@shared_task
+def watermark_image(image_id):
+    """Hide an image's secret message in its original upload and store the result as its watermarked image"""
+    img = Image.objects.get(pk=image_id)
+    watermarked_buffer = io.BytesIO()
+    stego.hide(img.image.path, img.secret_message).save(watermarked_buffer, format='PNG',
+                                                        compress_level=settings.WATERMARK_PNG_COMPRESS_LEVEL)
+    # Storage streams the buffer in place; ContentFile(getvalue()) would copy the whole PNG first
+    img.watermarked_image.save(f'watermarked_{secrets.token_urlsafe(12)}.png', File(watermarked_buffer), save=False)
+    img.save(update_fields=['watermarked_image'])
@@ -1,26 +1,38 @@
+import datetime
+import functools
+import hashlib
+import io
+import logging
 import os
+import queue
+import secrets
 import threading
 import time
-import uuid
-from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID, uuid4
 
+import orjson
 from PIL import Image as PILImage, UnidentifiedImageError
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.conf import settings
-from django.core.files import File
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.http import FileResponse, Http404, HttpResponse
 from django.http import JsonResponse
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from django.views.decorators.csrf import csrf_exempt
 # Prometheus metrics
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
-from stegano import lsb
 
+from converter import stego
 from converter.blockchain import Blockchain
-from converter.redis_timeseries import blockchain_metrics
+from converter.consumers import prepack
+from converter.redis_timeseries import get_blockchain_metrics
+from converter.tasks import watermark_image
 from .models import Image
 
+logger = logging.getLogger(__name__)
+
 # Custom metrics for watermarking/blockchain
 watermark_operations = Counter('watermark_operations_total', 'Total watermark operations', ['operation_type'])
 blockchain_operations = Counter('blockchain_operations_total', 'Total blockchain operations', ['operation_type'])
@@ -32,6 +44,19 @@ image_processing_duration = Histogram('image_processing_duration_seconds', 'Time
 watermark_success_rate = Counter('watermark_success_total', 'Successful watermark operations', ['operation'])
 watermark_error_rate = Counter('watermark_error_total', 'Failed watermark operations', ['operation', 'error_type'])
 
+# Label children resolved once: labels() hashes its arguments under a lock on every call
+mine_start_operations = blockchain_operations.labels(operation_type='mine_start')
+mine_success_operations = blockchain_operations.labels(operation_type='mine_success')
+mine_failure_operations = blockchain_operations.labels(operation_type='mine_failure')
+add_transaction_operations = blockchain_operations.labels(operation_type='add_transaction')
+stress_add_transaction_operations = blockchain_operations.labels(operation_type='stress_add_transaction')
+combined_stress_blockchain_operations = blockchain_operations.labels(operation_type='combined_stress')
+encode_operations = watermark_operations.labels(operation_type='encode')
+stress_test_operations = watermark_operations.labels(operation_type='stress_test')
+combined_stress_watermark_operations = watermark_operations.labels(operation_type='combined_stress')
+stress_test_errors = watermark_error_rate.labels(operation='stress_test', error_type='processing_error')
+combined_stress_errors = watermark_error_rate.labels(operation='combined_stress', error_type='worker_error')
+
 # Instantiate the Blockchain with optimized difficulty
 blockchain = Blockchain(difficulty=3)  # Reduced difficulty for faster mining
 node_address = str(uuid4()).replace('-', '')
@@ -39,35 +64,139 @@ node_address = str(uuid4()).replace('-', '')
 # Channel layer for real-time updates
 channel_layer = get_channel_layer()
 
+# (length, tip hash) -> JSON text of blockchain.chain, so full snapshots are serialised once per block
+_chain_json_cache = (None, '')
+# (chain list, display rows) for blockchain_view; blocks are append-only, so rows are only added for new ones
+_chain_rows_cache = (None, [])
+
+
+def get_chain_json():
+    """Return (length, JSON text) for the current chain, re-serialising only when the tip changes"""
+    global _chain_json_cache
+    chain = blockchain.chain
+    key = (len(chain), blockchain.hash(chain[-1]))
+    if _chain_json_cache[0] != key:
+        _chain_json_cache = (key, orjson.dumps(chain).decode())
+    return key[0], _chain_json_cache[1]
+
+
+def get_chain_rows():
+    """Template rows for blockchain.chain, formatting only the blocks appended since the last call"""
+    global _chain_rows_cache
+    chain = blockchain.chain
+    cached_chain, rows = _chain_rows_cache
+    if cached_chain is not chain or len(rows) > len(chain):  # Chain replaced: start over
+        rows = []
+    if len(rows) < len(chain):
+        # A new list rather than extend(), so a page rendering the previous rows never sees them change
+        rows = rows + [{
+            'index': block.get('index', 0),
+            'timestamp': format_block_timestamp(block.get('timestamp', '')),
+            'proof': block.get('proof', 0),
+            'previous_hash': block.get('previous_hash', ''),
+            'transactions': block.get('transactions', [])
+        } for block in chain[len(rows):]]
+        _chain_rows_cache = (chain, rows)
+    return rows
+
+
+# Notifications are queued and sent by one thread; a flush drains everything queued so far through a single
+# async_to_sync call, instead of each caller paying for its own event loop round trip
+notification_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notifier')
+pending_notifications = queue.SimpleQueue()
+notification_flush_queued = threading.Event()
+
+
+def queue_notification(group, message_type, message, data=None):
+    """Queue a WebSocket message for group and schedule a flush unless one is already waiting to start"""
+    if not channel_layer:
+        return
+    pending_notifications.put((group, prepack({
+        'type': message_type,
+        'message': message,
+        'data': data or {}
+    })))
+    if not notification_flush_queued.is_set():
+        notification_flush_queued.set()
+        notification_executor.submit(_flush_notifications)
+
+
+def _flush_notifications():
+    # Clear first, so notifications queued while this flush sends schedule the next one
+    notification_flush_queued.clear()
+    batch = []
+    while True:
+        try:
+            batch.append(pending_notifications.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        try:
+            async_to_sync(_send_notifications)(batch)
+        except Exception as e:
+            logger.error("Notification error: %s", e)
+
+
+async def _send_notifications(batch):
+    for group, message in batch:
+        await channel_layer.group_send(group, message)
+
 
 def notify_blockchain_update(message, data=None):
     """Send real-time blockchain updates via WebSocket"""
-    if channel_layer:
-        async_to_sync(channel_layer.group_send)(
-            'blockchain_updates',
-            {
-                'type': 'blockchain_update',
-                'message': message,
-                'data': data or {}
-            }
-        )
+    queue_notification('blockchain_updates', 'blockchain_update', message, data)
 
 
 def notify_mining_update(message, data=None):
     """Send real-time mining updates via WebSocket"""
-    if channel_layer:
-        async_to_sync(channel_layer.group_send)(
-            'mining_updates',
-            {
-                'type': 'mining_update',
-                'message': message,
-                'data': data or {}
-            }
-        )
+    queue_notification('mining_updates', 'mining_update', message, data)
+
+
+def format_block_timestamp(timestamp):
+    """Render a block timestamp; new blocks store integer nanoseconds since the epoch"""
+    if isinstance(timestamp, int):
+        return str(datetime.datetime.fromtimestamp(timestamp / 1e9))
+    return timestamp
 
 
 # Background mining thread
 mining_lock = threading.Lock()
+# One miner thread; mining requested while a run is already queued joins that run instead of piling up
+mining_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='miner')
+queued_mining = None  # Future of the run waiting to start, if any
+queued_mining_lock = threading.Lock()
+
+
+def schedule_mining():
+    """Queue an async_mine_block run unless one is already waiting to start; return that run's future"""
+    global queued_mining
+    with queued_mining_lock:
+        if queued_mining is None:
+            queued_mining = mining_executor.submit(_run_queued_mining)
+        return queued_mining
+
+
+def _run_queued_mining():
+    global queued_mining
+    # Unqueue first, so transactions added while this run mines can queue the next one
+    with queued_mining_lock:
+        queued_mining = None
+    async_mine_block()
+
+
+def link_block_images(block):
+    """Point the images whose watermark transactions landed in block at it, in a single UPDATE"""
+    image_ids = []
+    for transaction in block['transactions']:
+        if transaction.get('type') == 'watermark':
+            try:
+                image_ids.append(UUID(transaction['timestamp']))  # The watermark view records the image id here
+            except ValueError:
+                pass  # Stress-test transactions have no image behind them
+    if image_ids:
+        Image.objects.filter(id__in=image_ids).update(block_index=block['index'],
+                                                      blockchain_hash=blockchain.hash(block))
+        notify_blockchain_update(f'{len(image_ids)} image(s) linked to block {block["index"]}')
 
 
 def async_mine_block():
@@ -75,15 +204,16 @@ def async_mine_block():
     with mining_lock:
         if blockchain.transactions:
             start_time = time.time()
+            ts_metrics = get_blockchain_metrics()
 
             # Update metrics BEFORE mining starts to capture pending transactions
             pending_count = len(blockchain.transactions)
             pending_transactions.set(pending_count)
-            blockchain_operations.labels(operation_type='mine_start').inc()
+            mine_start_operations.inc()
 
             # Record in Redis TimeSeries for advanced querying
-            blockchain_metrics.record_pending_transactions(pending_count)
-            blockchain_metrics.record_operation('mine_start')
+            ts_metrics.record_pending_transactions(pending_count)
+            ts_metrics.record_operation('mine_start')
 
             try:
                 block = blockchain.batch_mine_pending_transactions()
@@ -92,93 +222,104 @@ def async_mine_block():
 
                     # Update Prometheus metrics
                     mining_duration.observe(duration)
-                    blockchain_operations.labels(operation_type='mine_success').inc()
+                    mine_success_operations.inc()
                     blockchain_length.set(len(blockchain.chain))
                     pending_transactions.set(len(blockchain.transactions))
 
                     # Record in Redis TimeSeries
-                    blockchain_metrics.record_mining_duration(duration)
-                    blockchain_metrics.record_blockchain_length(len(blockchain.chain))
-                    blockchain_metrics.record_pending_transactions(len(blockchain.transactions))
-                    blockchain_metrics.record_operation('mine_success')
+                    ts_metrics.record_mining_duration(duration)
+                    ts_metrics.record_blockchain_length(len(blockchain.chain))
+                    ts_metrics.record_pending_transactions(len(blockchain.transactions))
+                    ts_metrics.record_operation('mine_success')
 
                     # Notify about successful mining
                     notify_blockchain_update(f'Async Block {block["index"]} successfully mined!')
+                    link_block_images(block)
                 else:
-                    blockchain_operations.labels(operation_type='mine_failure').inc()
-                    blockchain_metrics.record_operation('mine_failure')
+                    mine_failure_operations.inc()
+                    ts_metrics.record_operation('mine_failure')
                     pending_transactions.set(len(blockchain.transactions))
             except Exception as e:
-                blockchain_operations.labels(operation_type='mine_failure').inc()
-                blockchain_metrics.record_operation('mine_failure')
+                mine_failure_operations.inc()
+                ts_metrics.record_operation('mine_failure')
                 pending_transactions.set(len(blockchain.transactions))
-                print(f"Mining error: {e}")
+                logger.error("Mining error: %s", e)
 
 
-# Add imports for QR code reading
+# Add imports for QR code reading (zxing-cpp unless QR_DECODER selects the pyzbar fallback)
 from PIL import Image as PILImage
-from pyzbar.pyzbar import decode
+if settings.QR_DECODER == 'pyzbar':
+    from pyzbar.pyzbar import ZBarSymbol, decode
+
+    def read_qr_text(qr_img):
+        """Text of the first QR code found in qr_img, or None"""
+        decoded_objs = decode(qr_img, symbols=[ZBarSymbol.QRCODE])
+        return decoded_objs[0].data.decode('utf-8') if decoded_objs else None
+else:
+    import zxingcpp
+
+    def read_qr_text(qr_img):
+        """Text of the first QR code found in qr_img, or None"""
+        results = zxingcpp.read_barcodes(qr_img, formats=zxingcpp.BarcodeFormat.QRCode)
+        return results[0].text if results else None
+
+
+def read_qr_upload_text(qr_code_file):
+    """read_qr_text for an uploaded file, cached for an hour by a BLAKE2b digest of its bytes"""
+    qr_hasher = hashlib.blake2b(digest_size=16)
+    for chunk in qr_code_file.chunks():
+        qr_hasher.update(chunk)
+    cache_key = f'qr:{qr_hasher.hexdigest()}'
+    qr_text = cache.get(cache_key)
+    if qr_text is None:
+        qr_code_file.seek(0)
+        qr_text = read_qr_text(PILImage.open(qr_code_file))
+        if qr_text is not None:
+            cache.set(cache_key, qr_text, 3600)
+    return qr_text
 
 def watermark(request):
     if request.method == 'POST':
-        image = request.FILES.get('image')
-        qr_code_file = request.FILES.get('qr_code')  # Expecting a file input named 'qr_code'
+        image_file = request.FILES.get('image')
+        # The form sends the message as a QR code image; API clients may post it as text instead
+        qr_code_file = request.FILES.get('qr_code')
 
         if not image_file:
             return JsonResponse({'error': 'No image file provided.'}, status=400)
+        try:
+            # Reject bad uploads here, since the Celery worker has no request to answer
+            PILImage.open(image_file).verify()
+        except (OSError, SyntaxError):
+            return JsonResponse({'error': 'Invalid or corrupted image file.'}, status=400)
+
+        if qr_code_file:
+            # Extract text from the QR code image, reusing the result for a byte-identical upload
+            secret_message = read_qr_upload_text(qr_code_file)
+            if secret_message is None:
+                return render(request, 'converter/watermark.html', {'error': 'Could not decode QR code.'})
+        else:
+            secret_message = request.POST.get('secret_message')
         if not secret_message:
             return JsonResponse({'error': 'Secret message cannot be empty.'}, status=400)
 
-        # Save the uploaded image to disk first
-        original_filename = f'original_{uuid.uuid4()}_{image_file.name}'
-        original_path = os.path.join(settings.MEDIA_ROOT, 'images', original_filename)
-        os.makedirs(os.path.dirname(original_path), exist_ok=True)
-        with open(original_path, 'wb+') as destination:
-            for chunk in image_file.chunks():
-                destination.write(chunk)
-
-        # Save the uploaded QR code image to disk
-        qr_filename = f'qr_{uuid.uuid4()}_{qr_code_file.name}'
-        qr_path = os.path.join(settings.MEDIA_ROOT, 'qr_codes', qr_filename)
-        os.makedirs(os.path.dirname(qr_path), exist_ok=True)
-        with open(qr_path, 'wb+') as destination:
-            for chunk in qr_code_file.chunks():
-                destination.write(chunk)
-
-        # Extract text from the QR code image
-        qr_img = PILImage.open(qr_path)
-        decoded_objs = decode(qr_img)
-        if not decoded_objs:
-            return render(request, 'converter/watermark.html', {'error': 'Could not decode QR code.'})
-        secret_message = decoded_objs[0].data.decode('utf-8')
-
-        # Use the saved file path for watermarking
-        watermarked_image = lsb.hide(original_path, secret_message, auto_convert_rgb=True)
-        watermarked_filename = f'watermarked_{uuid.uuid4()}.png'
-        watermarked_path = os.path.join(settings.MEDIA_ROOT, 'watermarked_images', watermarked_filename)
-        os.makedirs(os.path.dirname(watermarked_path), exist_ok=True)
-        watermarked_image.save(watermarked_path)
-
-        # Save both images to the model
+        # Store the upload and insert its row in one step, then hand the watermarking off to the Celery worker
         img = Image(secret_message=secret_message)
-        with open(original_path, 'rb') as f:
-            img.image.save(original_filename, File(f), save=False)
-        with open(watermarked_path, 'rb') as f:
-            img.watermarked_image.save(watermarked_filename, File(f), save=False)
-        img.save()
+        img.image.save(f'original_{secrets.token_urlsafe(12)}_{image_file.name}', image_file)
+        watermark_image.delay(img.id)
+        image_hasher = hashlib.sha256()  # Hash the upload itself instead of reading the saved copy back
+        for chunk in image_file.chunks(chunk_size=1 << 20):  # 1 MiB reads for uploads spooled to disk
+            image_hasher.update(chunk)
 
         # Add transaction to blockchain (batch processing) with watermark metadata
-        import hashlib
-
         # Create meaningful metadata for the watermarked image
-        image_hash = hashlib.sha256(open(original_path, 'rb').read()).hexdigest()
+        image_hash = image_hasher.hexdigest()
         message_hash = hashlib.sha256(secret_message.encode()).hexdigest()
 
         watermark_metadata = {
             'image_hash': image_hash,
             'message_hash': message_hash,
             'created_at': str(img.id),
-            'file_size': os.path.getsize(watermarked_path)
+            'file_size': image_file.size
         }
 
         blockchain.add_transaction(
@@ -188,35 +329,21 @@ def watermark(request):
             metadata=watermark_metadata
         )
 
-        # Notify about new watermark transaction
-        notify_blockchain_update(f'New watermarked image: {str(img.id)[:8]} | Hash: {image_hash[:16]}')
-
-        # Start async mining if there are pending transactions
-        if len(blockchain.transactions) >= 1:  # Mine when we have at least 1 transaction
-            threading.Thread(target=async_mine_block, daemon=True).start()
-
-            # Wait briefly for mining to complete
-            time.sleep(0.1)
-
-            # Update image with blockchain data if block was mined
-            if blockchain.chain:
-                latest_block = blockchain.get_previous_block()
-                img.block_index = latest_block['index']
-                img.blockchain_hash = blockchain.hash(latest_block)
-                img.save()
-
-                # Notify about successful blockchain integration
-                notify_blockchain_update(f'Image {str(img.id)[:8]} linked to block {latest_block["index"]}')
+        # Mine in the background; the miner links the image to its block once the block exists
+        schedule_mining()
 
         # Update Prometheus metrics
-        watermark_operations.labels(operation_type='encode').inc()
-        blockchain_operations.labels(operation_type='add_transaction').inc()
+        encode_operations.inc()
+        add_transaction_operations.inc()
         pending_transactions.set(len(blockchain.transactions))
         blockchain_length.set(len(blockchain.chain))
 
+        # Set already when the task ran inline
+        img.refresh_from_db(fields=['watermarked_image'])
         context = {
-            'watermarkedImage': img.watermarked_image.url,
+            'watermarkedImage': img.watermarked_image.url if img.watermarked_image else None,
             'image': img.image.url,
+            'image_id': img.id,
         }
 
         return render(request, 'converter/watermark_success.html', context)
@@ -224,13 +351,21 @@ def watermark(request):
     return render(request, 'converter/watermark.html')
 
 
+def download_watermarked(request, pk):
+    """Send a watermarked image as an attachment, streamed from its open file rather than read into memory"""
+    img = get_object_or_404(Image, pk=pk)
+    if not img.watermarked_image:
+        raise Http404('The image has not been watermarked yet.')
+    return FileResponse(img.watermarked_image.open('rb'), as_attachment=True, content_type='image/png')
+
+
 def reveal_watermark(request):
     if request.method == 'POST':
         image = request.FILES.get('image')
         if image:
             # Reveal the watermark
-            revealed_message = lsb.reveal(image)
-            print(f"Revealed message: {revealed_message}")
+            revealed_message = stego.reveal(image)
+            logger.debug("Revealed message: %s", revealed_message)
             return render(request, 'converter/reveal_watermark.html', {'revealed_message': revealed_message})
     return render(request, 'converter/reveal_watermark.html', {'revealed_message': None})
 
@@ -241,16 +376,7 @@ def blockchain_view(request):
     pending_transactions.set(len(blockchain.transactions))
 
     # Ensure we're passing clean data to avoid template variable conflicts
-    chain_data = []
-    for block in blockchain.chain:
-        block_data = {
-            'index': block.get('index', 0),
-            'timestamp': block.get('timestamp', ''),
-            'proof': block.get('proof', 0),
-            'previous_hash': block.get('previous_hash', ''),
-            'transactions': block.get('transactions', [])
-        }
-        chain_data.append(block_data)
+    chain_data = get_chain_rows()
 
     context = {
         'chain': chain_data,
@@ -286,7 +412,7 @@ def async_mine_block_endpoint(request):
         notify_mining_update('Async mining requested...')
 
         # Start mining in background
-        threading.Thread(target=async_mine_block, daemon=True).start()
+        schedule_mining()
 
         return JsonResponse({
             'status': 'mining_started',
@@ -325,7 +451,7 @@ def stress_test_mining(request):
                 # Small delay to allow Prometheus to capture the spike
                 time.sleep(0.05)
 
-                threading.Thread(target=async_mine_block, daemon=True).start()
+                schedule_mining()
                 time.sleep(0.1)  # Small delay to prevent overwhelming
 
         # Start multiple concurrent mining threads
@@ -342,6 +468,25 @@ def stress_test_mining(request):
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
 
+# Pool for stress-test watermarking, one thread per core. PIL's codecs and hashlib release the GIL, so the
+# threads overlap on the image work without forking processes off the web server
+stress_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='stress')
+
+
+@functools.cache
+def stress_test_image():
+    """The plain red image every stress-test watermark starts from; stego.hide embeds into a copy of it"""
+    return PILImage.new('RGB', (100, 100), color='red')
+
+
+@functools.cache
+def stress_test_png():
+    """(PNG bytes, SHA-256 hex digest) of stress_test_image()"""
+    img_buffer = io.BytesIO()
+    stress_test_image().save(img_buffer, format='PNG')
+    return img_buffer.getvalue(), hashlib.sha256(img_buffer.getbuffer()).hexdigest()
+
+
 @csrf_exempt
 def stress_test_watermarking(request):
     """Stress test endpoint for watermarking operations"""
@@ -350,38 +495,26 @@ def stress_test_watermarking(request):
 
         def create_test_watermark(i):
             try:
-                # Create a simple test image
-                from PIL import Image as PILImage
-                import io
-
-                # Create a simple test image
-                test_image = PILImage.new('RGB', (100, 100), color='red')
-                img_buffer = io.BytesIO()
-                test_image.save(img_buffer, format='PNG')
-                img_buffer.seek(0)
-
                 # Save test image
-                test_filename = f'stress_test_{uuid4().hex[:8]}.png'
+                test_png, image_hash = stress_test_png()
+                test_filename = f'stress_test_{secrets.token_urlsafe(6)}.png'
                 test_path = os.path.join(settings.MEDIA_ROOT, 'images', test_filename)
-                os.makedirs(os.path.dirname(test_path), exist_ok=True)
 
                 with open(test_path, 'wb') as f:
-                    f.write(img_buffer.getvalue())
+                    f.write(test_png)
 
                 # Create watermark
                 secret_message = f"Stress test message {i}"
-                watermarked_image = lsb.hide(test_path, secret_message, auto_convert_rgb=True)
-                watermarked_filename = f'watermarked_stress_{uuid4().hex[:8]}.png'
+                watermarked_image = stego.hide(stress_test_image(), secret_message)  # Not decoded back from test_path
+                watermarked_filename = f'watermarked_stress_{secrets.token_urlsafe(6)}.png'
                 watermarked_path = os.path.join(settings.MEDIA_ROOT, 'watermarked_images', watermarked_filename)
-                os.makedirs(os.path.dirname(watermarked_path), exist_ok=True)
-                watermarked_image.save(watermarked_path)
+                watermarked_image.save(watermarked_path, format='PNG',
+                                       compress_level=settings.WATERMARK_PNG_COMPRESS_LEVEL)
 
                 # Update metrics
-                watermark_operations.labels(operation_type='stress_test').inc()
+                stress_test_operations.inc()
 
                 # Add to blockchain
-                import hashlib
-                image_hash = hashlib.sha256(open(test_path, 'rb').read()).hexdigest()
                 message_hash = hashlib.sha256(secret_message.encode()).hexdigest()
 
                 watermark_metadata = {
@@ -398,15 +531,15 @@ def stress_test_watermarking(request):
                     metadata=watermark_metadata
                 )
 
-                blockchain_operations.labels(operation_type='stress_add_transaction').inc()
+                stress_add_transaction_operations.inc()
 
             except Exception as e:
-                watermark_error_rate.labels(operation='stress_test', error_type='processing_error').inc()
-                print(f"Stress test error {i}: {e}")
+                stress_test_errors.inc()
+                logger.error("Stress test error %d: %s", i, e)
 
         # Create watermarks concurrently
         for i in range(num_operations):
-            threading.Thread(target=create_test_watermark, args=(i,), daemon=True).start()
+            stress_executor.submit(create_test_watermark, i)
             time.sleep(0.05)  # Small delay to prevent overwhelming
 
         return JsonResponse({
@@ -451,21 +584,21 @@ def stress_test_combined(request):
                             )
                         # Update pending count AFTER adding multiple transactions
                         pending_transactions.set(len(blockchain.transactions))
-                        watermark_operations.labels(operation_type='combined_stress').inc()
+                        combined_stress_watermark_operations.inc()
 
                         # Small delay to allow Prometheus to capture the spike
                         time.sleep(0.1)
                     else:
                         # Trigger mining
-                        threading.Thread(target=async_mine_block, daemon=True).start()
+                        schedule_mining()
 
                     operations += 1
-                    blockchain_operations.labels(operation_type='combined_stress').inc()
+                    combined_stress_blockchain_operations.inc()
                     time.sleep(0.3)  # Slower pace to allow pending transactions to accumulate
 
                 except Exception as e:
-                    watermark_error_rate.labels(operation='combined_stress', error_type='worker_error').inc()
-                    print(f"Combined stress worker {worker_id} error: {e}")
+                    combined_stress_errors.inc()
+                    logger.error("Combined stress worker %s error: %s", worker_id, e)
 
         # Start multiple workers
         num_workers = 2  # Reduced workers to allow more pending accumulation
@@ -493,25 +626,22 @@ def stress_test_pending_transactions(request):
 
         def create_pending_spike():
             for batch_num in range(num_batches):
-                # Add multiple transactions rapidly
-                for i in range(batch_size):
-                    blockchain.add_transaction(
-                        sender=f"pending_test_{uuid4().hex[:8]}",
-                        receiver=f"batch_{batch_num}_tx_{i}",
-                        amount=1
-                    )
+                # Add the whole batch at once
+                blockchain.add_transactions(
+                    (f"pending_test_{uuid4().hex[:8]}", f"batch_{batch_num}_tx_{i}", 1)
+                    for i in range(batch_size)
+                )
 
                 # Update pending count after adding the batch
                 current_pending = len(blockchain.transactions)
                 pending_transactions.set(current_pending)
-                print(f"Created pending spike: {current_pending} transactions")
+                logger.debug("Created pending spike: %d transactions", current_pending)
 
                 # Wait longer to allow Prometheus to capture the spike
                 time.sleep(1.0)
 
                 # Then start mining to process some transactions
-                for _ in range(2):  # Start 2 mining threads
-                    threading.Thread(target=async_mine_block, daemon=True).start()
+                schedule_mining()
 
                 # Wait before next batch
                 time.sleep(2.0)
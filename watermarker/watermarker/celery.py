@@ -0,0 +1,15 @@
+"""
+Celery application for the watermarker project.
+
+Workers are started with ``celery -A watermarker worker -Q watermarking``.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'watermarker.settings')
+
+app = Celery('watermarker')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -27,6 +27,15 @@ DEBUG = os.environ.get('DJANGO_DEBUG', 'False').lower() == 'true'
 
 ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,web').split(',')
 
+# Mount the /stress-test/ endpoints; set DJANGO_STRESS_TESTING=False to leave them out
+STRESS_TESTING = os.environ.get('DJANGO_STRESS_TESTING', 'True').lower() == 'true'
+
+# QR code decoder for watermark uploads: 'zxing-cpp', or 'pyzbar' where only libzbar is available
+QR_DECODER = os.environ.get('QR_DECODER', 'zxing-cpp')
+
+# zlib level for watermarked PNGs: 1 encodes several times faster than PIL's default 6 for a slightly larger file
+WATERMARK_PNG_COMPRESS_LEVEL = int(os.environ.get('WATERMARK_PNG_COMPRESS_LEVEL', '1'))
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -136,6 +145,14 @@ else:
     SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
     SESSION_CACHE_ALIAS = 'default'
 
+# Celery Configuration - watermarking runs on a worker consuming the 'watermarking' queue
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TASK_ROUTES = {'converter.tasks.watermark_image': {'queue': 'watermarking'}}
+# Run tasks inline in tests and wherever no worker is deployed
+CELERY_TASK_ALWAYS_EAGER = bool('test' in sys.argv or os.environ.get('TESTING')
+                                or os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true')
+CELERY_TASK_EAGER_PROPAGATES = True
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {